@@ -1,6 +1,16 @@
+from django.utils.decorators import method_decorator
 from django.views.generic.base import TemplateView
 
+from core.page_cache import cache_page_tagged, static_tags
 
+
+CACHE_PERIOD = 60 * 60 * 24
+
+
+@method_decorator(
+    cache_page_tagged(CACHE_PERIOD, "about_author", static_tags),
+    name="dispatch",
+)
 class AboutAutrhorView(TemplateView):
     """
     Display an infomation about site's owner.
@@ -12,6 +22,10 @@ class AboutAutrhorView(TemplateView):
     template_name = "about/author.html"
 
 
+@method_decorator(
+    cache_page_tagged(CACHE_PERIOD, "about_tech", static_tags),
+    name="dispatch",
+)
 class AboutTechView(TemplateView):
     """
     Display an infomation about site's technologies.
@@ -0,0 +1,118 @@
+from collections import namedtuple
+
+
+Field = namedtuple("Field", ("paths", "get"))
+
+
+class InvalidParameter(ValueError):
+    """A query parameter the API can not serve."""
+
+
+def _author(obj):
+    return obj.author.username if obj.author_id else None
+
+
+def _image(post):
+    if not post.image:
+        return None
+    return {
+        "url": post.image.url,
+        "width": post.image_width,
+        "height": post.image_height,
+    }
+
+
+class Fieldset:
+    """
+    The fields a resource can be serialized with. Each field knows
+    the model paths it reads, so a sparse fieldset selects only those
+    columns and joins only the relations they cross.
+    """
+
+    def __init__(self, fields, always=("id",)):
+        self.fields = fields
+        self.always = always
+
+    def parse(self, value):
+        """Returns the field names of a '?fields=' value, all by default."""
+        if not value:
+            return list(self.fields)
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise InvalidParameter(
+                "Unknown fields: %s. Available: %s." % (
+                    ", ".join(unknown), ", ".join(self.fields)
+                )
+            )
+        return names
+
+    def apply(self, queryset, names):
+        """Restricts a queryset to the columns of the fields."""
+        paths = set(self.always)
+        for name in names:
+            paths.update(self.fields[name].paths)
+        relations = {
+            path.rsplit("__", 1)[0] for path in paths if "__" in path
+        }
+        return queryset.select_related(*relations).only(*paths)
+
+    def serialize(self, obj, names):
+        return {name: self.fields[name].get(obj) for name in names}
+
+
+POST_FIELDS = Fieldset(
+    {
+        "id": Field(("id",), lambda post: post.pk),
+        "text": Field(("text",), lambda post: post.text),
+        "pub_date": Field(
+            ("pub_date",), lambda post: post.pub_date.isoformat()
+        ),
+        "author": Field(("author__username",), _author),
+        "group": Field(
+            ("group__slug",),
+            lambda post: post.group.slug if post.group_id else None,
+        ),
+        "image": Field(("image", "image_width", "image_height"), _image),
+        "comment_count": Field(
+            ("comment_count",), lambda post: post.comment_count
+        ),
+    },
+    always=("id", "pub_date"),
+)
+COMMENT_FIELDS = Fieldset(
+    {
+        "id": Field(("id",), lambda comment: comment.pk),
+        "post": Field(("post_id",), lambda comment: comment.post_id),
+        "author": Field(("author__username",), _author),
+        "text": Field(("text",), lambda comment: comment.text),
+        "created": Field(
+            ("created",), lambda comment: comment.created.isoformat()
+        ),
+    },
+    always=("id", "created"),
+)
+GROUP_FIELDS = Fieldset({
+    "id": Field(("id",), lambda group: group.pk),
+    "title": Field(("title",), lambda group: group.title),
+    "slug": Field(("slug",), lambda group: group.slug),
+    "description": Field(
+        ("description",), lambda group: group.description
+    ),
+})
+PROFILE_FIELDS = Fieldset({
+    "username": Field(("username",), lambda user: user.username),
+    "first_name": Field(("first_name",), lambda user: user.first_name),
+    "last_name": Field(("last_name",), lambda user: user.last_name),
+    "posts_count": Field(
+        ("stats__posts_count",), lambda user: user.stats.posts_count
+    ),
+    "followers_count": Field(
+        ("stats__followers_count",),
+        lambda user: user.stats.followers_count,
+    ),
+    "following_count": Field(
+        ("stats__following_count",),
+        lambda user: user.stats.following_count,
+    ),
+})
@@ -0,0 +1,226 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.testing import assert_query_budget
+from posts.models import Comment, Follow, Group, Post
+
+from ..urls import urlpatterns
+
+
+User = get_user_model()
+POSTS_COUNT = 3
+
+
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.follower = User.objects.create_user(username="follower")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        for num in range(POSTS_COUNT):
+            cls.post = Post.objects.create(
+                author=cls.author,
+                text=f"Тестовый пост {num}",
+                group=cls.group,
+            )
+        Comment.objects.create(
+            author=cls.follower, post=cls.post, text="Комментарий",
+        )
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        cls.kwargs = {
+            "slug": cls.group.slug,
+            "username": cls.author.username,
+            "post_id": cls.post.pk,
+        }
+
+    def setUp(self) -> None:
+        self.guest_client = Client()
+        self.follower_client = Client()
+        self.follower_client.force_login(ApiViewsTest.follower)
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_resources_serialized(self):
+        """Test the API returns the fields of posts, groups and profiles."""
+        resources = {
+            reverse("api:post", args=(ApiViewsTest.post.pk,)): {
+                "id": ApiViewsTest.post.pk,
+                "text": "Тестовый пост 2",
+                "author": "author",
+                "group": "test_slug",
+                "comment_count": 1,
+            },
+            reverse("api:group", args=("test_slug",)): {
+                "title": "Тестовая группа",
+                "description": "Тестовое описание",
+            },
+            reverse("api:profile", args=("author",)): {
+                "username": "author",
+                "posts_count": POSTS_COUNT,
+                "followers_count": 1,
+            },
+        }
+        for url, fields in resources.items():
+            with self.subTest(url=url):
+                data = self.guest_client.get(url).json()
+                for name, value in fields.items():
+                    self.assertEqual(data[name], value)
+
+    def test_sparse_fieldset(self):
+        """Test '?fields=' limits both the keys and the selected columns."""
+        with CaptureQueriesContext(connection) as queries:
+            data = self.guest_client.get(
+                reverse("api:posts"), {"fields": "text"}
+            ).json()
+        self.assertEqual(
+            data["results"][0], {"text": "Тестовый пост 2"}
+        )
+        sql = queries.captured_queries[-1]["sql"]
+        self.assertNotIn("JOIN", sql)
+        self.assertNotIn("image", sql)
+
+    def test_bad_parameters_rejected(self):
+        """Test unknown fields and missing objects answer with JSON."""
+        responses = {
+            self.guest_client.get(
+                reverse("api:posts"), {"fields": "text,secret"}
+            ): 400,
+            self.guest_client.get(reverse("api:post", args=(0,))): 404,
+            self.guest_client.get(
+                reverse("api:group_posts", args=("missing",))
+            ): 404,
+            self.guest_client.get(
+                reverse("api:profile_posts", args=("missing",))
+            ): 404,
+        }
+        for response, status in responses.items():
+            with self.subTest(status=status):
+                self.assertEqual(response.status_code, status)
+                self.assertIn("detail", response.json())
+
+    def test_cursor_pages(self):
+        """Test following 'next' links walks every post once."""
+        url = reverse("api:group_posts", args=("test_slug",))
+        data = self.guest_client.get(url, {"limit": 2}).json()
+        texts = [post["text"] for post in data["results"]]
+        self.assertIsNone(data["previous"])
+        data = self.guest_client.get(data["next"]).json()
+        texts += [post["text"] for post in data["results"]]
+        self.assertIsNone(data["next"])
+        self.assertIsNotNone(data["previous"])
+        self.assertEqual(
+            texts, [f"Тестовый пост {num}" for num in (2, 1, 0)]
+        )
+
+    def test_not_modified(self):
+        """Test an ETag holds until a new comment arrives."""
+        url = reverse("api:comments", args=(ApiViewsTest.post.pk,))
+        etag = self.guest_client.get(url)["ETag"]
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            author=ApiViewsTest.author, post=ApiViewsTest.post, text="Ответ",
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_comments_oldest_first(self):
+        """Test comments are paged oldest first, as under the post."""
+        for num in range(3):
+            Comment.objects.create(
+                author=ApiViewsTest.author,
+                post=ApiViewsTest.post,
+                text=f"Ответ {num}",
+            )
+        url = reverse("api:comments", args=(ApiViewsTest.post.pk,))
+        data = self.guest_client.get(url + "?limit=2").json()
+        texts = [comment["text"] for comment in data["results"]]
+        data = self.guest_client.get(data["next"]).json()
+        texts += [comment["text"] for comment in data["results"]]
+        self.assertIsNone(data["next"])
+        self.assertEqual(
+            texts, ["Комментарий", "Ответ 0", "Ответ 1", "Ответ 2"]
+        )
+
+    def test_follow_feed(self):
+        """Test the follow feed needs a login and has a private ETag."""
+        url = reverse("api:follow")
+        self.assertEqual(self.guest_client.get(url).status_code, 401)
+        response = self.follower_client.get(url)
+        self.assertEqual(len(response.json()["results"]), POSTS_COUNT)
+        self.assertIn("private", response["Cache-Control"])
+        response = self.follower_client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_deleted_author_serialized_as_none(self):
+        """Test posts and comments of deleted users have no author."""
+        post = Post.objects.create(author=None, text="Пост без автора")
+        Comment.objects.create(author=None, post=post, text="Без автора")
+        urls = (
+            reverse("api:post", args=(post.pk,)),
+            reverse("api:posts") + "?fields=author",
+            reverse("api:comments", args=(post.pk,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.guest_client.get(url).json()
+                data = data.get("results", [data])[0]
+                self.assertIsNone(data["author"])
+
+    def test_hole_markers_in_text_kept(self):
+        """Test post text looking like hole markers is served verbatim."""
+        texts = ("<!--hole:nope-->", "<!--hole:comment_form?post_id=1-->")
+        for text in texts:
+            post = Post.objects.create(author=ApiViewsTest.author, text=text)
+            urls = (
+                reverse("api:posts"),
+                reverse("api:post", args=(post.pk,)),
+                reverse("api:profile_posts", args=("author",)),
+            )
+            for url in urls:
+                with self.subTest(url=url, text=text):
+                    for _ in range(2):
+                        response = self.follower_client.get(url)
+                        data = response.json()
+                        data = data.get("results", [data])[0]
+                        self.assertEqual(data["text"], text)
+
+    def test_follow_feed_with_shared_authors(self):
+        """Test posts of an author with several followers show once."""
+        other = User.objects.create_user(username="other")
+        Follow.objects.create(user=other, author=ApiViewsTest.author)
+        url = reverse("api:follow") + "?limit=2"
+        texts = []
+        while url:
+            data = self.follower_client.get(url).json()
+            texts += [post["text"] for post in data["results"]]
+            url = data["next"]
+        self.assertEqual(
+            texts, [f"Тестовый пост {num}" for num in (2, 1, 0)]
+        )
+
+    def test_views_within_budget(self):
+        """Test every view of api.urls keeps to its query budget."""
+        for pattern in urlpatterns:
+            url = reverse(
+                f"api:{pattern.name}",
+                kwargs={
+                    name: self.kwargs[name]
+                    for name in pattern.pattern.converters
+                },
+            )
+            with self.subTest(url=url):
+                assert_query_budget(url, self.follower_client)
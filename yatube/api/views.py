@@ -0,0 +1,259 @@
+import hashlib
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET
+
+from api.serializers import (
+    COMMENT_FIELDS,
+    GROUP_FIELDS,
+    POST_FIELDS,
+    PROFILE_FIELDS,
+    InvalidParameter,
+)
+from core.page_cache import cache_page_tagged, condition_tagged
+from core.queries import query_budget
+from posts import cache_tags
+from posts.lookups import get_author_or_404, get_group_or_404
+from posts.models import Comment, Group, Post
+from posts.paginators import CURSOR_ORDERING, CursorPaginator
+from posts.views import (
+    CACHE_PERIOD,
+    COMMENT_ORDERING,
+    FOLLOW_CURSOR_ORDERING,
+    follow_scope,
+)
+
+
+User = get_user_model()
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+JSON_PARAMS = {"ensure_ascii": False}
+
+
+def error_response(message, status):
+    return JsonResponse(
+        {"detail": message}, status=status, json_dumps_params=JSON_PARAMS
+    )
+
+
+def api_view(view_func):
+    """Answers GET only, with JSON errors for 404 and bad parameters."""
+    @require_GET
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except Http404:
+            return error_response("Not found.", 404)
+        except InvalidParameter as error:
+            return error_response(str(error), 400)
+    return _wrapped_view
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get("limit", PAGE_SIZE))
+    except ValueError:
+        raise InvalidParameter("'limit' must be a number.")
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def page_link(request, name, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params.pop("after", None)
+    params.pop("before", None)
+    params[name] = cursor
+    return request.build_absolute_uri("?" + params.urlencode())
+
+
+def page_response(
+    request,
+    queryset,
+    fieldset,
+    ordering=CURSOR_ORDERING,
+    attrs=None,
+    scope=None,
+    descending=True,
+):
+    """
+    Serializes a page of a queryset, fetched with keyset pagination
+    on 'after'/'before' cursors and restricted to '?fields='.
+    """
+    names = fieldset.parse(request.GET.get("fields"))
+    page = CursorPaginator(
+        fieldset.apply(queryset, names),
+        page_size(request),
+        ordering,
+        attrs=attrs,
+        descending=descending,
+        scope=scope,
+    ).get_page(
+        after=request.GET.get("after"), before=request.GET.get("before")
+    )
+    return JsonResponse(
+        {
+            "results": [fieldset.serialize(obj, names) for obj in page],
+            "next": page_link(request, "after", page.next_cursor),
+            "previous": page_link(request, "before", page.previous_cursor),
+        },
+        json_dumps_params=JSON_PARAMS,
+    )
+
+
+def object_response(request, queryset, fieldset, **lookup):
+    names = fieldset.parse(request.GET.get("fields"))
+    obj = fieldset.apply(queryset, names).filter(**lookup).first()
+    if obj is None:
+        raise Http404
+    return JsonResponse(
+        fieldset.serialize(obj, names), json_dumps_params=JSON_PARAMS
+    )
+
+
+@query_budget(1)
+@condition_tagged(cache_tags.index_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="api_posts", tags=cache_tags.index_tags
+)
+@api_view
+def posts(request):
+    """Pages through every :model:'posts.Post', newest first."""
+    return page_response(request, Post.objects.all(), POST_FIELDS)
+
+
+@query_budget(2)
+@condition_tagged(cache_tags.post_detail_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD,
+    key_prefix="api_post",
+    tags=cache_tags.post_detail_tags,
+)
+@api_view
+def post(request, post_id):
+    """Returns a single :model:'posts.Post'."""
+    return object_response(request, Post.objects.all(), POST_FIELDS,
+                           pk=post_id)
+
+
+@query_budget(3)
+@condition_tagged(cache_tags.post_detail_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD,
+    key_prefix="api_comments",
+    tags=cache_tags.post_detail_tags,
+)
+@api_view
+def comments(request, post_id):
+    """
+    Pages through the :model:'posts.Comment' instances of a post,
+    oldest first.
+    """
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    return page_response(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        COMMENT_FIELDS,
+        COMMENT_ORDERING,
+        descending=False,
+    )
+
+
+@query_budget(1)
+@condition_tagged(cache_tags.groups_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="api_groups", tags=cache_tags.groups_tags
+)
+@api_view
+def groups(request):
+    """Returns every :model:'posts.Group'."""
+    names = GROUP_FIELDS.parse(request.GET.get("fields"))
+    return JsonResponse(
+        {
+            "results": [
+                GROUP_FIELDS.serialize(group, names)
+                for group in GROUP_FIELDS.apply(
+                    Group.objects.order_by("pk"), names
+                )
+            ],
+        },
+        json_dumps_params=JSON_PARAMS,
+    )
+
+
+@query_budget(1)
+@condition_tagged(cache_tags.group_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="api_group", tags=cache_tags.group_tags
+)
+@api_view
+def group(request, slug):
+    """Returns a single :model:'posts.Group'."""
+    return object_response(request, Group.objects.all(), GROUP_FIELDS,
+                           slug=slug)
+
+
+@query_budget(2)
+@condition_tagged(cache_tags.group_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="api_group_posts", tags=cache_tags.group_tags
+)
+@api_view
+def group_posts(request, slug):
+    """Pages through the :model:'posts.Post' instances of a group."""
+    group = get_group_or_404(slug)
+    return page_response(request, group.posts.all(), POST_FIELDS)
+
+
+@query_budget(1)
+@condition_tagged(cache_tags.profile_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="api_profile", tags=cache_tags.profile_tags
+)
+@api_view
+def profile(request, username):
+    """Returns the names and counters of an author."""
+    return object_response(request, User.objects.all(), PROFILE_FIELDS,
+                           username=username)
+
+
+@query_budget(2)
+@condition_tagged(cache_tags.profile_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD,
+    key_prefix="api_profile_posts",
+    tags=cache_tags.profile_tags,
+)
+@api_view
+def profile_posts(request, username):
+    """Pages through the :model:'posts.Post' instances of an author."""
+    author = get_author_or_404(username)
+    return page_response(request, author.posts.all(), POST_FIELDS)
+
+
+@query_budget(3)
+@api_view
+def follow(request):
+    """
+    Pages through the posts of the authors the user follows.
+    The ETag is a digest of the page, as the timeline has no tags.
+    """
+    if not request.user.is_authenticated:
+        return error_response("Authentication required.", 401)
+    response = page_response(
+        request,
+        Post.objects.all(),
+        POST_FIELDS,
+        FOLLOW_CURSOR_ORDERING,
+        attrs=CURSOR_ORDERING,
+        scope=follow_scope(request.user),
+    )
+    etag = '"%s"' % hashlib.md5(response.content).hexdigest()
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return get_conditional_response(request, etag=etag, response=response)
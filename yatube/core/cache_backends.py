@@ -0,0 +1,296 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from django.core.cache.backends.base import (
+    DEFAULT_TIMEOUT,
+    MEMCACHE_MAX_KEY_LENGTH,
+    BaseCache,
+)
+
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache ("
+    " key TEXT PRIMARY KEY,"
+    " value BLOB NOT NULL,"
+    " expires REAL,"
+    " accessed REAL NOT NULL,"
+    " size INTEGER NOT NULL"
+    ") WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)",
+    "CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)",
+)
+
+# Left as is by make_key(), every other character is percent-encoded.
+KEY_SAFE = ":/@!$&'()*+,;=~"
+
+
+def make_key(key, key_prefix, version):
+    """
+    Builds keys valid for any backend: group slugs and usernames
+    may be Cyrillic, so non-ASCII characters, spaces and controls
+    are percent-encoded and overlong keys replaced by a digest.
+    """
+    key = quote("%s:%s:%s" % (key_prefix, version, key), safe=KEY_SAFE)
+    if len(key) > MEMCACHE_MAX_KEY_LENGTH:
+        digest = hashlib.md5(key.encode()).hexdigest()
+        key = "%s:%s:%s" % (key_prefix, version, digest)
+    return key
+
+
+class SQLiteCache(BaseCache):
+    """
+    A cache shared by every worker process of a node, stored
+    in a SQLite file in WAL mode, so readers never block the writer.
+    Entries are evicted least recently used first once the
+    stored values outgrow OPTIONS['MAX_SIZE'] bytes.
+
+    Keys are built with :func:'make_key' unless KEY_FUNCTION is set.
+
+    OPTIONS:
+    MAX_SIZE - the size cap in bytes, 64 MB by default;
+    TOUCH_INTERVAL - seconds between access time updates of an
+    entry, so hot reads do not turn into writes;
+    CULL_EVERY - writes of a process between checks of the cap;
+    BUSY_TIMEOUT - seconds to wait for the write lock.
+    """
+
+    # Lets in-process L1 caches notice a clear() right away.
+    clear_count = 0
+
+    def __init__(self, location, params):
+        params = {"KEY_FUNCTION": make_key, **params}
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._path = location
+        self._max_size = int(options.get("MAX_SIZE", 64 * 1024 * 1024))
+        self._touch_interval = float(options.get("TOUCH_INTERVAL", 60))
+        self._cull_every = int(options.get("CULL_EVERY", 50))
+        self._busy_timeout = float(options.get("BUSY_TIMEOUT", 5))
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(
+                self._path,
+                timeout=self._busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _write(self, key, value, timeout, replace=True):
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        verb = "REPLACE" if replace else "IGNORE"
+        with self._transaction() as db:
+            if not replace:
+                db.execute(
+                    "DELETE FROM cache WHERE key = ? AND expires <= ?",
+                    (key, now),
+                )
+            cursor = db.execute(
+                "INSERT OR %s INTO cache VALUES (?, ?, ?, ?, ?)" % verb,
+                (key, value, expires, now, len(value)),
+            )
+        self._cull()
+        return cursor.rowcount > 0
+
+    def _cull(self):
+        self._writes += 1
+        if self._writes % self._cull_every:
+            return
+        size = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()[0]
+        if size <= self._max_size:
+            return
+        with self._transaction() as db:
+            db.execute(
+                "DELETE FROM cache WHERE expires <= ?", (time.time(),)
+            )
+            # Drop the least recently used entries until a tenth
+            # of the cap is free again.
+            db.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM ("
+                "  SELECT key, SUM(size) OVER ("
+                "   ORDER BY accessed DESC, key"
+                "  ) AS kept FROM cache"
+                " ) WHERE kept > ?"
+                ")",
+                (self._max_size * 0.9,),
+            )
+
+    def _read_many(self, keys):
+        if not keys:
+            return {}
+        now = time.time()
+        rows = self._db.execute(
+            "SELECT key, value, expires, accessed FROM cache "
+            "WHERE key IN (%s)" % ", ".join("?" * len(keys)),
+            keys,
+        ).fetchall()
+        found, expired, touched = {}, [], []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                expired.append(key)
+                continue
+            found[key] = pickle.loads(value)
+            if now - accessed > self._touch_interval:
+                touched.append((now, key))
+        if expired or touched:
+            with self._transaction() as db:
+                db.executemany(
+                    "DELETE FROM cache WHERE key = ? AND expires <= ?",
+                    [(key, now) for key in expired],
+                )
+                db.executemany(
+                    "UPDATE cache SET accessed = ? WHERE key = ?", touched
+                )
+        return found
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._write(
+            self._key(key, version), value, timeout, replace=False
+        )
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._read_many([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        found = self._read_many(list(keys))
+        return {keys[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(self._key(key, version), value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        rows = []
+        for key, value in data.items():
+            value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            rows.append(
+                (self._key(key, version), value, expires, now, len(value))
+            )
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)", rows
+            )
+        self._cull()
+        return []
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] is not None and row[1] <= time.time():
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            db.execute(
+                "UPDATE cache SET value = ?, size = ? WHERE key = ?",
+                (data, len(data), key),
+            )
+        return value
+
+    def incr_many(self, deltas, timeout=None, version=None):
+        """
+        Adds deltas to integer entries, creating missing ones,
+        all in one write transaction. Returns the new values.
+        """
+        keys = {self._key(key, version): key for key in deltas}
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        values = {}
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT key, value, expires FROM cache "
+                "WHERE key IN (%s)" % ", ".join("?" * len(keys)),
+                list(keys),
+            ).fetchall()
+            current = {
+                key: pickle.loads(value)
+                for key, value, row_expires in rows
+                if row_expires is None or row_expires > now
+            }
+            written = []
+            for key, name in keys.items():
+                values[name] = current.get(key, 0) + deltas[name]
+                data = pickle.dumps(values[name], pickle.HIGHEST_PROTOCOL)
+                written.append((key, data, expires, now, len(data)))
+            db.executemany(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                written,
+            )
+        self._cull()
+        return values
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE cache SET expires = ? WHERE key = ?",
+                (self.get_backend_timeout(timeout), self._key(key, version)),
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        with self._transaction() as db:
+            db.executemany(
+                "DELETE FROM cache WHERE key = ?",
+                [(self._key(key, version),) for key in keys],
+            )
+
+    def has_key(self, key, version=None):
+        return self.get(key, self, version=version) is not self
+
+    def clear(self):
+        with self._transaction() as db:
+            db.execute("DELETE FROM cache")
+        SQLiteCache.clear_count += 1
+
+    def close(self, **kwargs):
+        # Connections stay open for the life of the thread,
+        # reopening the file on every request costs more than it saves.
+        pass
@@ -0,0 +1,72 @@
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+BUSY_MESSAGES = ("database is locked", "database is busy")
+
+
+def sqlite_pragmas():
+    return getattr(settings, "SQLITE_PRAGMAS", {})
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Tunes every new SQLite connection with settings.SQLITE_PRAGMAS."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute("PRAGMA %s = %s" % (name, value))
+
+
+def is_busy(error):
+    return any(message in str(error) for message in BUSY_MESSAGES)
+
+
+def retry_on_busy(func):
+    """
+    Runs a write in its own transaction, retrying it with
+    jittered exponential backoff while SQLite reports the database
+    as locked. Inside an outer transaction it runs once, as the
+    outer block could not be replayed.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        options = getattr(settings, "SQLITE_BUSY_RETRY", {})
+        attempts = options.get("ATTEMPTS", 5)
+        base_delay = options.get("BASE_DELAY", 0.05)
+        max_delay = options.get("MAX_DELAY", 1.0)
+        if connection.in_atomic_block:
+            return func(*args, **kwargs)
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as error:
+                if not is_busy(error) or attempt == attempts - 1:
+                    raise
+            delay = min(max_delay, base_delay * 2 ** attempt)
+            time.sleep(random.uniform(0, delay))
+    return wrapper
+
+
+def save_with_retry(instance, **kwargs):
+    """Saves a model instance with :func:'retry_on_busy'."""
+    adding = instance._state.adding
+
+    @retry_on_busy
+    def save():
+        if adding:
+            # A rolled back attempt may have left its primary key.
+            instance.pk = None
+            instance._state.adding = True
+        instance.save(**kwargs)
+
+    save()
+    return instance
@@ -0,0 +1,84 @@
+import re
+from contextlib import contextmanager
+from functools import partial
+from urllib.parse import parse_qsl, urlencode
+
+from django.template.loader import render_to_string
+from django.utils.cache import patch_vary_headers
+from django.utils.safestring import mark_safe
+
+
+HOLE = "<!--hole:%s-->"
+HOLE_RE = re.compile(r"<!--hole:(\w+)(?:\?(.*?))?-->")
+renderers = {}
+
+
+def register(name):
+    """
+    Registers a renderer of the per-user part of cached pages.
+    It is called with the request and the string arguments of the
+    :tag:'hole' tag, and returns HTML.
+    """
+    def decorator(func):
+        renderers[name] = func
+        return func
+    return decorator
+
+
+@contextmanager
+def deferred(request):
+    """
+    Makes :tag:'hole' tags leave markers instead of rendering.
+    ``request._holes_left`` tells afterwards if any marker was left.
+    """
+    request._defer_holes = True
+    request._holes_left = False
+    try:
+        yield
+    finally:
+        request._defer_holes = False
+
+
+def render(request, name, **kwargs):
+    """Renders a hole, or a marker of it while the page is cached."""
+    kwargs = {
+        key: str(value)
+        for key, value in kwargs.items()
+        if value not in (None, "", False)
+    }
+    if getattr(request, "_defer_holes", False):
+        request._holes_left = True
+        query = urlencode(kwargs)
+        return mark_safe(HOLE % (f"{name}?{query}" if query else name))
+    return mark_safe(renderers[name](request, **kwargs))
+
+
+def _fill_marker(request, match):
+    renderer = renderers.get(match.group(1))
+    if renderer is None:
+        return match.group(0)
+    return renderer(request, **dict(parse_qsl(match.group(2) or "")))
+
+
+def fill(request, response):
+    """
+    Renders the holes of a cached page for the current user.
+    Only HTML pages rendered with markers are touched, so text
+    that merely looks like a marker, e.g. in JSON, is left as is.
+    """
+    if response.streaming or not (
+        getattr(response, "has_holes", False)
+        and response.get("Content-Type", "").startswith("text/html")
+    ):
+        return response
+    content = response.content.decode(response.charset)
+    response.content = HOLE_RE.sub(
+        partial(_fill_marker, request), content
+    )
+    patch_vary_headers(response, ("Cookie",))
+    return response
+
+
+@register("header")
+def header(request):
+    return render_to_string("includes/header.html", request=request)
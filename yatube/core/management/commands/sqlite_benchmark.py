@@ -0,0 +1,108 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+SCHEMA = (
+    "CREATE TABLE post ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " text TEXT NOT NULL,"
+    " pub_date REAL NOT NULL"
+    ")",
+    "CREATE INDEX post_pub_date ON post (pub_date)",
+)
+SEED_ROWS = 10000
+# What a plain Django connection gets: the 5 s timeout of sqlite3.
+DEFAULT_PRAGMAS = {"busy_timeout": 5000}
+
+
+def connect(path, pragmas):
+    db = sqlite3.connect(path, timeout=0, isolation_level=None)
+    for name, value in pragmas.items():
+        db.execute("PRAGMA %s = %s" % (name, value))
+    return db
+
+
+def run_worker(path, pragmas, seconds, write_ratio, seed):
+    """Mixes page reads and inserts, counts what got through."""
+    rng = random.Random(seed)
+    db = connect(path, pragmas)
+    reads = writes = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            if rng.random() < write_ratio:
+                db.execute("BEGIN IMMEDIATE")
+                db.execute(
+                    "INSERT INTO post (text, pub_date) VALUES (?, ?)",
+                    ("benchmark " * 20, time.time()),
+                )
+                db.execute("COMMIT")
+                writes += 1
+            else:
+                db.execute(
+                    "SELECT id, text FROM post "
+                    "ORDER BY pub_date DESC LIMIT 10 OFFSET ?",
+                    (rng.randrange(100),),
+                ).fetchall()
+                reads += 1
+        except sqlite3.OperationalError:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            errors += 1
+    db.close()
+    return reads, writes, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures SQLite read/write throughput of concurrent processes "
+        "with default pragmas and with settings.SQLITE_PRAGMAS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument("--write-ratio", type=float, default=0.2)
+
+    def run(self, pragmas, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "benchmark.sqlite3")
+            db = connect(path, pragmas)
+            for statement in SCHEMA:
+                db.execute(statement)
+            db.executemany(
+                "INSERT INTO post (text, pub_date) VALUES (?, ?)",
+                (("seed " * 20, num) for num in range(SEED_ROWS)),
+            )
+            db.close()
+            workers = options["workers"]
+            with Pool(workers) as pool:
+                results = pool.starmap(run_worker, [
+                    (
+                        path, pragmas, options["seconds"],
+                        options["write_ratio"], seed,
+                    )
+                    for seed in range(workers)
+                ])
+        reads, writes, errors = map(sum, zip(*results))
+        seconds = options["seconds"]
+        return reads / seconds, writes / seconds, errors
+
+    def handle(self, *args, **options):
+        runs = {
+            "default": DEFAULT_PRAGMAS,
+            "tuned": settings.SQLITE_PRAGMAS,
+        }
+        for name, pragmas in runs.items():
+            reads, writes, errors = self.run(pragmas, options)
+            self.stdout.write(
+                f"{name:>8}: {reads:10.0f} reads/s {writes:8.0f} writes/s "
+                f"{errors:6d} lock errors"
+            )
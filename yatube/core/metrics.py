@@ -0,0 +1,223 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.urls import URLPattern, URLResolver, get_resolver
+
+
+# Upper bounds of the latency buckets, in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PHASES = ("resolve", "view", "db", "template", "cache")
+QUANTILES = (0.5, 0.95, 0.99)
+# The shared cache only adds up integers.
+MICROSECONDS = 1000000
+# Requests no view was resolved for, by the status of the response.
+HANDLERS = {
+    403: "core:permission_denied",
+    404: "core:page_not_found",
+    500: "core:server_error",
+}
+
+
+def metrics_options():
+    return getattr(settings, "REQUEST_METRICS", {})
+
+
+def view_names():
+    """Returns names of the views of settings.REQUEST_METRICS apps."""
+    namespaces = metrics_options().get("NAMESPACES", ())
+    names = []
+
+    def walk(patterns, prefix):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                namespace = pattern.namespace
+                walk(
+                    pattern.url_patterns,
+                    f"{prefix}{namespace}:" if namespace else prefix,
+                )
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                if prefix and prefix.split(":")[0] in namespaces:
+                    names.append(prefix + pattern.name)
+
+    walk(get_resolver().url_patterns, "")
+    return sorted(set(names) | set(HANDLERS.values()))
+
+
+def quantile(q, buckets, count):
+    """
+    Estimates a quantile from bucket counts, interpolating inside
+    the bucket it falls in, as Prometheus' histogram_quantile() does.
+    """
+    if not count:
+        return None
+    rank = q * count
+    seen = 0
+    for index, bound in enumerate(BUCKETS):
+        if seen + buckets[index] >= rank:
+            lower = BUCKETS[index - 1] if index else 0
+            share = (rank - seen) / buckets[index] if buckets[index] else 0
+            return lower + (bound - lower) * share
+        seen += buckets[index]
+    return BUCKETS[-1]
+
+
+class LatencyHistograms:
+    """
+    Latency histograms and phase totals of requests per view. A
+    process adds its observations up in memory and flushes them to
+    the shared cache every FLUSH_INTERVAL seconds with atomic
+    increments, in a single transaction where the backend has
+    incr_many(), so the metrics cover every worker of the node.
+
+    The counters are ordinary cache entries, so a cache over its
+    size cap may evict them with the least recently used pages.
+    Scrapers see that as a counter reset, which rate() and
+    histogram_quantile() already handle.
+    """
+
+    def __init__(self, alias=DEFAULT_CACHE_ALIAS):
+        self.alias = alias
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flushed = time.monotonic()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def observe(self, view, seconds, phases):
+        bucket = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self._pending[(view, "bucket", bucket)] += 1
+            self._pending[(view, "count")] += 1
+            self._pending[(view, "sum")] += int(seconds * MICROSECONDS)
+            for phase, spent in phases.items():
+                self._pending[(view, "phase", phase)] += int(
+                    spent * MICROSECONDS
+                )
+            due = (
+                time.monotonic() - self._flushed
+                >= metrics_options().get("FLUSH_INTERVAL", 1.0)
+            )
+        if due:
+            self.flush()
+
+    @staticmethod
+    def _key(*parts):
+        return "metrics:" + ":".join(map(str, parts))
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed = time.monotonic()
+        if not pending:
+            return
+        deltas = {
+            self._key(*parts): delta for parts, delta in pending.items()
+        }
+        incr_many = getattr(self.cache, "incr_many", None)
+        if incr_many is not None:
+            # One write transaction for the whole flush.
+            incr_many(deltas, None)
+            return
+        for key, delta in deltas.items():
+            self.cache.add(key, 0, None)
+            try:
+                self.cache.incr(key, delta)
+            except ValueError:
+                # Evicted between add() and incr().
+                self.cache.set(key, delta, None)
+
+    def read(self, views):
+        """Returns counts, sums and phase totals of views."""
+        keys = {}
+        for view in views:
+            keys[view] = {
+                "buckets": [
+                    self._key(view, "bucket", index)
+                    for index in range(len(BUCKETS) + 1)
+                ],
+                "count": self._key(view, "count"),
+                "sum": self._key(view, "sum"),
+                "phases": {
+                    phase: self._key(view, "phase", phase)
+                    for phase in PHASES
+                },
+            }
+        found = self.cache.get_many([
+            key
+            for view_keys in keys.values()
+            for key in (
+                *view_keys["buckets"],
+                view_keys["count"],
+                view_keys["sum"],
+                *view_keys["phases"].values(),
+            )
+        ])
+        return {
+            view: {
+                "buckets": [found.get(key, 0) for key in view_keys["buckets"]],
+                "count": found.get(view_keys["count"], 0),
+                "sum": found.get(view_keys["sum"], 0) / MICROSECONDS,
+                "phases": {
+                    phase: found.get(key, 0) / MICROSECONDS
+                    for phase, key in view_keys["phases"].items()
+                },
+            }
+            for view, view_keys in keys.items()
+        }
+
+    def render(self, views):
+        """Renders the metrics of views in Prometheus text format."""
+        lines = [
+            "# HELP yatube_request_duration_seconds Request latency.",
+            "# TYPE yatube_request_duration_seconds histogram",
+        ]
+        quantile_lines = [
+            "# HELP yatube_request_duration_quantile_seconds "
+            "Request latency quantiles estimated from the histogram.",
+            "# TYPE yatube_request_duration_quantile_seconds gauge",
+        ]
+        phase_lines = [
+            "# HELP yatube_request_phase_seconds_total "
+            "Time spent in each phase of requests.",
+            "# TYPE yatube_request_phase_seconds_total counter",
+        ]
+        for view, data in self.read(views).items():
+            cumulative = 0
+            for bound, count in zip(
+                (*BUCKETS, "+Inf"), data["buckets"]
+            ):
+                cumulative += count
+                lines.append(
+                    f'yatube_request_duration_seconds_bucket'
+                    f'{{view="{view}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'yatube_request_duration_seconds_sum{{view="{view}"}} '
+                f'{data["sum"]}'
+            )
+            lines.append(
+                f'yatube_request_duration_seconds_count{{view="{view}"}} '
+                f'{data["count"]}'
+            )
+            for q in QUANTILES:
+                value = quantile(q, data["buckets"], data["count"])
+                quantile_lines.append(
+                    f'yatube_request_duration_quantile_seconds'
+                    f'{{view="{view}",quantile="{q}"}} '
+                    f'{"NaN" if value is None else value}'
+                )
+            for phase, spent in data["phases"].items():
+                phase_lines.append(
+                    f'yatube_request_phase_seconds_total'
+                    f'{{view="{view}",phase="{phase}"}} {spent}'
+                )
+        return "\n".join(lines + quantile_lines + phase_lines) + "\n"
+
+
+histograms = LatencyHistograms()
@@ -0,0 +1,106 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from core import timing
+from core.metrics import HANDLERS, histograms, metrics_options
+from core.queries import QueryLog
+
+
+logger = logging.getLogger("core.queries")
+
+
+def inspector_options():
+    return getattr(settings, "QUERY_INSPECTOR", {})
+
+
+class QueryInspectorMiddleware:
+    """
+    Records the queries of every request and logs a summary per
+    view, warning about repeated query shapes, which point to N+1
+    loops, and about GET requests over the view's query budget.
+    Enabled with settings.QUERY_INSPECTOR['ENABLED'].
+    """
+
+    def __init__(self, get_response):
+        if not inspector_options().get("ENABLED"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = inspector_options().get("REPEATED", 3)
+
+    def __call__(self, request):
+        with QueryLog() as log:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match is None:
+            return response
+        logger.info(
+            "%s: %d queries in %.1f ms",
+            match.view_name, len(log), log.duration * 1000,
+        )
+        for sql, count in log.repeated(self.threshold).items():
+            logger.warning(
+                "%s: %d queries of the same shape: %s",
+                match.view_name, count, sql,
+            )
+        budget = getattr(match.func, "query_budget", None)
+        if (
+            budget is not None
+            and request.method == "GET"
+            and len(log) > budget
+        ):
+            logger.warning(
+                "%s: %d queries, over its budget of %d",
+                match.view_name, len(log), budget,
+            )
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Splits every request into URL resolution, view code, ORM,
+    template rendering and cache time. Sends the split in a
+    Server-Timing header and adds it to the per-view latency
+    histograms of :mod:'core.metrics'. Must come first in
+    settings.MIDDLEWARE, enabled with settings.REQUEST_METRICS.
+    """
+
+    def __init__(self, get_response):
+        if not metrics_options().get("ENABLED"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        timer = timing.RequestTimer()
+        with timing.activate(timer):
+            with connection.execute_wrapper(timer.execute_wrapper):
+                # Up to process_view(), the other middleware and
+                # the URL resolver run.
+                timer.start("resolve")
+                response = self.get_response(request)
+                timer.stop()
+        total = time.perf_counter() - start
+        response["Server-Timing"] = ", ".join(
+            [
+                f"{phase};dur={spent * 1000:.2f}"
+                for phase, spent in timer.totals.items()
+            ]
+            + [f"total;dur={total * 1000:.2f}"]
+        )
+        match = request.resolver_match
+        if match is not None:
+            view = match.view_name
+        else:
+            view = HANDLERS.get(response.status_code, "unresolved")
+        histograms.observe(view, total, timer.totals)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timer = timing.current()
+        if timer is not None:
+            timer.stop()
+            timer.start("view")
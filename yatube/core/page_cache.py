@@ -0,0 +1,238 @@
+import hashlib
+import math
+import random
+import time
+import uuid
+from functools import partial, wraps
+
+from django.conf import settings
+from django.utils.cache import (
+    get_cache_key,
+    learn_cache_key,
+    patch_cache_control,
+)
+from django.views.decorators.http import condition
+
+from core import holes
+from core.tiered_cache import TieredCache
+
+
+TAG_KEY = "tag:%s"
+LOCK_KEY = "page-lock:%s"
+LATEST_KEY = "page-latest:%s"
+tag_cache = TieredCache("tags")
+page_cache = TieredCache("pages")
+
+
+def page_cache_options():
+    return getattr(settings, "PAGE_CACHE", {})
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def get_tag_versions(tags):
+    """
+    Returns the current version of every tag.
+    Tags never seen before (or evicted) get a fresh random version,
+    so pages cached under an older version can not come back.
+    """
+    keys = {TAG_KEY % tag: tag for tag in tags}
+    versions = tag_cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        versions[key] = tag_cache.add(key, _new_version(), None)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def invalidate_tags(*tags):
+    """Bumps the tags, orphaning every page cached under them."""
+    tag_cache.invalidate(
+        values={TAG_KEY % tag: _new_version() for tag in tags},
+        timeout=None,
+    )
+
+
+def static_tags(*args, **kwargs):
+    """Tags of pages no model change affects, only the timeout ends them."""
+    return ()
+
+
+def tags_digest(tags):
+    versions = get_tag_versions(tags)
+    raw = ".".join("%s=%s" % item for item in sorted(versions.items()))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def request_tags_digest(request, tags, *args, **kwargs):
+    """Digests the tags of the requested page once per request."""
+    digests = request.__dict__.setdefault("_tags_digests", {})
+    if tags not in digests:
+        digests[tags] = tags_digest(tags(*args, **kwargs))
+    return digests[tags]
+
+
+def is_fresh(entry, beta):
+    """
+    Tells if a cached page is fresh. Close to its expiry it turns
+    stale early at random, sooner when it took long to build, so
+    one request rebuilds a hot page before all of them miss at once
+    (XFetch, Vattani et al.).
+    """
+    response, expires, delta = entry
+    early = -delta * beta * math.log(1 - random.random())
+    return time.time() + early < expires
+
+
+class RebuildLock:
+    """
+    A lock on rebuilding a page, taken with an atomic add() in the
+    shared cache, so one request per page rebuilds it at a time.
+    It expires by itself if its holder dies.
+    """
+
+    def __init__(self, url_key):
+        self.key = LOCK_KEY % url_key
+        self.token = uuid.uuid4().hex
+        self.acquired = False
+
+    def acquire(self):
+        self.acquired = page_cache.l2.add(
+            self.key,
+            self.token,
+            page_cache_options().get("LOCK_TIMEOUT", 10),
+        )
+        return self.acquired
+
+    def release(self):
+        if self.acquired and page_cache.l2.get(self.key) == self.token:
+            page_cache.l2.delete(self.key)
+        self.acquired = False
+
+
+def page_url_key(key_prefix, request):
+    """Keys a page by its URL alone, the same under every tag version."""
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return "%s.%s" % (key_prefix, url)
+
+
+def _render(view_func, request, *args, **kwargs):
+    """Renders a page with markers in place of its holes."""
+    with holes.deferred(request):
+        response = view_func(request, *args, **kwargs)
+        if callable(getattr(response, "render", None)):
+            response.render()
+    response.has_holes = request._holes_left
+    return response
+
+
+def _store(request, response, timeout, prefix, url_key, spent):
+    cache_key = learn_cache_key(
+        request, response, timeout, prefix, cache=page_cache
+    )
+    now = time.time()
+    kept = timeout + page_cache_options().get("STALE", 30)
+    page_cache.set(cache_key, (response, now + timeout, spent), kept)
+    page_cache.set(LATEST_KEY % url_key, cache_key, kept)
+
+
+def _latest(url_key):
+    """Returns the last copy of a page, cached under older tags."""
+    cache_key = page_cache.get(LATEST_KEY % url_key)
+    return cache_key and page_cache.get(cache_key)
+
+
+def cache_page_tagged(timeout, key_prefix, tags):
+    """
+    Works like :func:'django.views.decorators.cache.cache_page',
+    but the key embeds the versions of the page's tags, so
+    :func:'invalidate_tags' drops the page right away and the
+    timeout only bounds memory use.
+    ``tags`` is called with the view arguments and returns tag names.
+    The page is cached without its :tag:'hole' parts, which are
+    rendered for every response, so all users share one copy.
+
+    Only one request at a time rebuilds an expired or invalidated
+    page, the others get the previous copy meanwhile. Copies are
+    kept for settings.PAGE_CACHE['STALE'] seconds past expiry.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_func(request, *args, **kwargs)
+            prefix = "%s.%s" % (
+                key_prefix,
+                request_tags_digest(request, tags, *args, **kwargs),
+            )
+            url_key = page_url_key(key_prefix, request)
+            cache_key = get_cache_key(
+                request, prefix, "GET", cache=page_cache
+            )
+            entry = cache_key and page_cache.get(cache_key)
+            beta = page_cache_options().get("BETA", 1.0)
+            if entry and is_fresh(entry, beta):
+                return holes.fill(request, entry[0])
+            lock = RebuildLock(url_key)
+            if not lock.acquire():
+                entry = entry or _latest(url_key)
+                if entry:
+                    return holes.fill(request, entry[0])
+            try:
+                started = time.time()
+                response = _render(view_func, request, *args, **kwargs)
+                if not (
+                    response.streaming
+                    or response.status_code != 200
+                    or response.cookies
+                ):
+                    _store(
+                        request, response, timeout, prefix, url_key,
+                        time.time() - started,
+                    )
+            finally:
+                lock.release()
+            return holes.fill(request, response)
+        return _wrapped_view
+    return decorator
+
+
+def _page_etag(tags, per_user, request, *args, **kwargs):
+    raw = request_tags_digest(request, tags, *args, **kwargs)
+    if per_user:
+        user = request.user
+        raw = "%s.%s.%s" % (
+            raw,
+            user.pk if user.is_authenticated else "",
+            # The comment form embeds a token made from this secret.
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+        )
+    return 'W/"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def condition_tagged(tags, per_user=True):
+    """
+    Answers a conditional GET with 304 Not Modified before the view
+    runs, when the ETag still matches. The ETag is made of the
+    versions of the page's tags and, unless ``per_user`` is off for
+    pages without :tag:'hole' parts, of what the holes depend on:
+    the user and their CSRF secret. Checking it costs no rendering.
+    Browsers are asked to revalidate on every visit.
+    """
+    def decorator(view_func):
+        conditional_view = condition(
+            etag_func=partial(_page_etag, tags, per_user)
+        )(view_func)
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                patch_cache_control(
+                    response,
+                    no_cache=True,
+                    **{"private" if per_user else "public": True},
+                )
+            return response
+        return _wrapped_view
+    return decorator
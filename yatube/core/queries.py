@@ -0,0 +1,67 @@
+import re
+import time
+from collections import Counter
+
+from django.db import connection
+
+
+NUMBERS = re.compile(r"\b\d+\b")
+PARAM_LISTS = re.compile(r"\((%s, )+%s\)")
+
+
+def query_budget(limit):
+    """
+    Declares the most queries a GET of a view may run, checked by
+    :func:'core.testing.assert_query_budget' and reported by
+    :class:'core.middleware.QueryInspectorMiddleware'.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def shape(sql):
+    """Strips the values from a query, leaving what an ORM call made."""
+    return PARAM_LISTS.sub("(%s, ...)", NUMBERS.sub("N", sql))
+
+
+class QueryLog:
+    """
+    Records the queries run on the default connection, with how
+    long each took, while used as a context manager.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.queries)
+
+    def repeated(self, threshold):
+        """Returns shapes run at least threshold times, an N+1 sign."""
+        shapes = Counter(shape(sql) for sql, _ in self.queries)
+        return {
+            sql: count for sql, count in shapes.items()
+            if count >= threshold
+        }
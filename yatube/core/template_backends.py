@@ -0,0 +1,27 @@
+from django.template.backends.django import DjangoTemplates
+
+from core.timing import timed
+
+
+class TimedTemplate:
+    """Counts rendering of a template to the 'template' request phase."""
+
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    @timed("template")
+    def render(self, context=None, request=None):
+        return self._template.render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with rendering timed per request."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
@@ -0,0 +1,15 @@
+from django import template
+
+from core import holes
+
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, **kwargs):
+    """
+    Renders a per-user part of a page, which a cached page keeps as
+    a marker and renders for every response.
+    """
+    return holes.render(context.get("request"), name, **kwargs)
@@ -0,0 +1,25 @@
+from django.test import Client
+from django.urls import resolve
+
+from core.queries import QueryLog
+
+
+def assert_query_budget(path, client=None, budget=None):
+    """
+    Requests a path and fails when its view runs more queries than
+    it declared with :func:'core.queries.query_budget', listing what it ran.
+    """
+    if budget is None:
+        budget = resolve(path).func.query_budget
+    with QueryLog() as log:
+        response = (client or Client()).get(path)
+    if len(log) > budget:
+        raise AssertionError(
+            "%s ran %d queries, over its budget of %d:\n%s" % (
+                path,
+                len(log),
+                budget,
+                "\n".join(sql for sql, _ in log.queries),
+            )
+        )
+    return response
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import time
+import warnings
+
+from django.core.cache.backends.base import CacheKeyWarning
+from django.test import SimpleTestCase
+
+from ..cache_backends import SQLiteCache
+
+
+TEST_MAX_SIZE = 4096
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.location = os.path.join(self.temp_dir, "cache.sqlite3")
+        self.cache = self.make_cache()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def make_cache(self, **options):
+        options.setdefault("MAX_SIZE", TEST_MAX_SIZE)
+        options.setdefault("CULL_EVERY", 1)
+        return SQLiteCache(self.location, {"OPTIONS": options})
+
+    def test_set_get_delete(self):
+        """Test the basic cache operations."""
+        cache = self.cache
+        cache.set("key", {"value": 1})
+        self.assertEqual(cache.get("key"), {"value": 1})
+        self.assertFalse(cache.add("key", "other"))
+        self.assertTrue(cache.add("new_key", "other"))
+        self.assertEqual(
+            cache.get_many(["key", "new_key", "missing"]),
+            {"key": {"value": 1}, "new_key": "other"},
+        )
+        cache.set("counter", 1)
+        self.assertEqual(cache.incr("counter"), 2)
+        cache.delete("key")
+        self.assertIsNone(cache.get("key"))
+        cache.clear()
+        self.assertFalse(cache.has_key("new_key"))
+
+    def test_incr_many(self):
+        """Test incr_many adds to entries and creates missing ones."""
+        self.cache.set("counter", 2)
+        self.cache.set("expired", 5, 0.05)
+        time.sleep(0.1)
+        self.assertEqual(
+            self.cache.incr_many({"counter": 3, "new": 1, "expired": 1}),
+            {"counter": 5, "new": 1, "expired": 1},
+        )
+        self.assertEqual(
+            self.cache.get_many(["counter", "new", "expired"]),
+            {"counter": 5, "new": 1, "expired": 1},
+        )
+
+    def test_non_ascii_keys(self):
+        """Test Cyrillic and overlong keys are stored without warnings."""
+        keys = ("groups:Тестовый слаг", "tags:" + "я" * 300)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            for key in keys:
+                with self.subTest(key=key[:20]):
+                    self.cache.set(key, key)
+                    self.assertEqual(self.cache.get(key), key)
+
+    def test_expiry(self):
+        """Test expired entries are not returned."""
+        self.cache.set("key", "value", 0.05)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get("key"))
+        self.assertTrue(self.cache.add("key", "value"))
+
+    def test_shared_between_instances(self):
+        """Test every worker sees one store."""
+        other_worker = self.make_cache()
+        self.cache.set("key", "value")
+        self.assertEqual(other_worker.get("key"), "value")
+        other_worker.delete("key")
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_lru_eviction(self):
+        """Test the size cap evicts the least recently used entries."""
+        cache = self.make_cache(TOUCH_INTERVAL=0)
+        cache.set("hot", "x" * 512)
+        for num in range(20):
+            cache.get("hot")
+            cache.set(f"cold_{num}", "x" * 512)
+        self.assertEqual(cache.get("hot"), "x" * 512)
+        self.assertIsNone(cache.get("cold_0"))
+        size = cache._db.execute("SELECT SUM(size) FROM cache").fetchone()[0]
+        self.assertLessEqual(size, TEST_MAX_SIZE)
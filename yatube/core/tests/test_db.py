@@ -0,0 +1,33 @@
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase, override_settings
+
+from ..db import retry_on_busy
+
+
+NORMAL_SYNCHRONOUS = 1
+
+
+@override_settings(SQLITE_BUSY_RETRY={"ATTEMPTS": 3, "BASE_DELAY": 0})
+class SQLiteTuningTest(TransactionTestCase):
+    def test_pragmas_applied(self):
+        """Test new connections get settings.SQLITE_PRAGMAS."""
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], NORMAL_SYNCHRONOUS)
+
+    def test_retry_on_busy(self):
+        """Test locked writes are retried, other errors are not."""
+        calls = []
+
+        @retry_on_busy
+        def write(error):
+            calls.append(error)
+            if len(calls) < 3:
+                raise OperationalError(error)
+            return len(calls)
+
+        self.assertEqual(write("database is locked"), 3)
+        calls.clear()
+        with self.assertRaises(OperationalError):
+            write("no such table: posts_post")
+        self.assertEqual(len(calls), 1)
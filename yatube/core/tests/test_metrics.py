@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..metrics import BUCKETS, histograms, metrics_options, quantile
+
+User = get_user_model()
+
+
+class MetricsTest(TestCase):
+    def setUp(self) -> None:
+        self.client = Client()
+        # Drops what earlier tests left unflushed.
+        histograms.flush()
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_server_timing_header(self):
+        """Test responses split their time in a Server-Timing header."""
+        response = self.client.get(reverse("posts:index"))
+        phases = [
+            entry.split(";")[0]
+            for entry in response["Server-Timing"].split(", ")
+        ]
+        for phase in ("resolve", "view", "db", "template", "cache", "total"):
+            with self.subTest(phase=phase):
+                self.assertIn(phase, phases)
+
+    def test_metrics_endpoint(self):
+        """Test the endpoint exposes histograms of every app's views."""
+        self.client.get(reverse("posts:index"))
+        self.client.get("/missing/page/")
+        self.client.force_login(
+            User.objects.create_user(username="staff", is_staff=True)
+        )
+        response = self.client.get(reverse("core:metrics"))
+        text = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            text,
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count'
+            '{view="core:page_not_found"} 1',
+            text,
+        )
+        for view in ("users:login", "about:author", "core:metrics"):
+            with self.subTest(view=view):
+                self.assertIn(f'view="{view}",quantile="0.99"', text)
+
+    def test_metrics_access(self):
+        """Test only staff and holders of the token see the metrics."""
+        url = reverse("core:metrics")
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(User.objects.create_user(username="user"))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.logout()
+        options = {**metrics_options(), "TOKEN": "secret"}
+        with override_settings(REQUEST_METRICS=options):
+            for authorization, status in (
+                ("Bearer secret", 200),
+                ("Bearer wrong", 404),
+                ("", 404),
+            ):
+                with self.subTest(authorization=authorization):
+                    response = self.client.get(
+                        url, HTTP_AUTHORIZATION=authorization
+                    )
+                    self.assertEqual(response.status_code, status)
+
+    def test_flush_in_one_transaction(self):
+        """Test a flush writes every counter in one transaction."""
+        histograms.observe("posts:index", 0.02, {"view": 0.01, "db": 0.005})
+        histograms.observe("posts:profile", 0.2, {"view": 0.1})
+        with mock.patch.object(
+            cache, "_transaction", wraps=cache._transaction
+        ) as transaction:
+            histograms.flush()
+        self.assertEqual(transaction.call_count, 1)
+        self.assertEqual(
+            histograms.read(["posts:index"])["posts:index"]["count"], 1
+        )
+
+    def test_quantile(self):
+        """Test quantiles are interpolated inside their bucket."""
+        buckets = [0] * (len(BUCKETS) + 1)
+        buckets[0] = buckets[1] = 50
+        self.assertAlmostEqual(quantile(0.5, buckets, 100), BUCKETS[0])
+        self.assertAlmostEqual(quantile(0.75, buckets, 100), 0.0075)
+        self.assertIsNone(quantile(0.5, buckets, 0))
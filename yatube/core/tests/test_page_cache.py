@@ -0,0 +1,138 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from .. import holes, page_cache
+from ..page_cache import (
+    RebuildLock,
+    cache_page_tagged,
+    invalidate_tags,
+    page_url_key,
+)
+
+
+TEST_TIMEOUT = 60
+TEST_TAG = "test:page"
+
+
+class PageCacheTest(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.builds = 0
+
+        def view(request):
+            self.builds += 1
+            return HttpResponse(f"build {self.builds}")
+
+        self.view = cache_page_tagged(
+            TEST_TIMEOUT, "test_page", lambda: (TEST_TAG,)
+        )(view)
+        self.factory = RequestFactory()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def get(self):
+        return self.view(self.factory.get("/page/")).content.decode()
+
+    def hold_lock(self):
+        lock = RebuildLock(
+            page_url_key("test_page", self.factory.get("/page/"))
+        )
+        self.assertTrue(lock.acquire())
+        self.addCleanup(lock.release)
+        return lock
+
+    def test_invalidated_page_served_stale_while_rebuilt(self):
+        """Test others get the old copy while one request rebuilds."""
+        self.assertEqual(self.get(), "build 1")
+        invalidate_tags(TEST_TAG)
+        lock = self.hold_lock()
+        self.assertEqual(self.get(), "build 1")
+        lock.release()
+        self.assertEqual(self.get(), "build 2")
+        self.assertEqual(self.get(), "build 2")
+
+    def test_expired_page_served_stale_while_rebuilt(self):
+        """Test an expired copy is served while a rebuild runs."""
+        self.get()
+        expired = time.time() + TEST_TIMEOUT + 1
+        with mock.patch.object(page_cache.time, "time", return_value=expired):
+            lock = self.hold_lock()
+            self.assertEqual(self.get(), "build 1")
+            lock.release()
+            self.assertEqual(self.get(), "build 2")
+
+    def test_miss_without_copy_is_rendered(self):
+        """Test a page with no copy at all is rendered despite a lock."""
+        self.hold_lock()
+        self.assertEqual(self.get(), "build 1")
+
+    def test_lock_released_after_error(self):
+        """Test a failed rebuild does not keep the lock."""
+        view = cache_page_tagged(TEST_TIMEOUT, "test_page", lambda: ())(
+            mock.Mock(side_effect=ValueError)
+        )
+        with self.assertRaises(ValueError):
+            view(self.factory.get("/page/"))
+        self.hold_lock()
+
+    def test_hot_page_refreshed_early(self):
+        """Test a page turns stale early by its build time."""
+        now = time.time()
+        entry = (None, now + 1, 0.5)
+        with mock.patch.object(page_cache.random, "random", return_value=0):
+            self.assertTrue(page_cache.is_fresh(entry, 1.0))
+        # -log(1 - 0.99) * 0.5 is 2.3 s, past the expiry.
+        with mock.patch.object(
+            page_cache.random, "random", return_value=0.99
+        ):
+            self.assertFalse(page_cache.is_fresh(entry, 1.0))
+
+
+class HoleFillTest(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def get(self, view):
+        view = cache_page_tagged(TEST_TIMEOUT, "test_holes", lambda: ())(
+            view
+        )
+        # A miss renders the page, a hit serves the cached copy.
+        return [
+            view(self.factory.get("/page/")).content.decode()
+            for _ in range(2)
+        ]
+
+    def test_holes_filled_in_html(self):
+        """Test markers left by the page are filled, unknown ones kept."""
+        def view(request):
+            return HttpResponse(
+                holes.render(request, "header") + "<!--hole:nope-->"
+            )
+
+        with mock.patch.dict(
+            holes.renderers, {"header": lambda request: "header"}
+        ):
+            for content in self.get(view):
+                self.assertEqual(content, "header<!--hole:nope-->")
+
+    def test_marker_text_outside_html_kept(self):
+        """Test text looking like a marker is not filled in JSON."""
+        text = "<!--hole:header-->"
+
+        def view(request):
+            return JsonResponse({"text": text})
+
+        with mock.patch.dict(
+            holes.renderers, {"header": lambda request: "header"}
+        ):
+            for content in self.get(view):
+                self.assertIn(text, content)
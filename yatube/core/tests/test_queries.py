@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..queries import QueryLog, shape
+
+User = get_user_model()
+
+
+class QueryLogTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = [
+            User.objects.create_user(username=f"user_{num}")
+            for num in range(3)
+        ]
+
+    def test_repeated_shapes(self):
+        """Test queries differing only in values count as one shape."""
+        with QueryLog() as log:
+            for user in QueryLogTest.users:
+                User.objects.get(pk=user.pk)
+            list(User.objects.filter(pk__in=[1, 2]))
+            list(User.objects.filter(pk__in=[1, 2, 3]))
+        self.assertEqual(len(log), 5)
+        self.assertEqual(list(log.repeated(3).values()), [3])
+        self.assertEqual(list(log.repeated(2).values()), [3, 2])
+        self.assertEqual(shape("LIMIT 10 OFFSET 20"), "LIMIT N OFFSET N")
+
+    @override_settings(QUERY_INSPECTOR={"ENABLED": True, "REPEATED": 3})
+    def test_middleware_logs_summary(self):
+        """Test the middleware logs queries of a view when enabled."""
+        with self.assertLogs("core.queries", "INFO") as logs:
+            Client().get(reverse("posts:index"))
+        self.assertIn("posts:index:", logs.output[0])
+        self.assertIn("queries in", logs.output[0])
@@ -0,0 +1,65 @@
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from ..tiered_cache import TieredCache
+
+
+TEST_CHECK_INTERVAL = 0.05
+
+
+class TieredCacheTest(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        # Two processes sharing the L2 cache.
+        self.worker = TieredCache("test")
+        self.other_worker = TieredCache("test")
+        for tiered_cache in (self.worker, self.other_worker):
+            tiered_cache.check_interval = TEST_CHECK_INTERVAL
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_hit_served_from_l1(self):
+        """Test L1 answers without a round-trip to L2."""
+        self.worker.set("key", "value")
+        cache.delete("test:key")
+        self.assertEqual(self.worker.get("key"), "value")
+        self.assertIsNone(self.other_worker.get("key"))
+
+    def test_l1_returns_copies(self):
+        """Test callers can not change the cached object."""
+        self.worker.set("key", {"value": 1})
+        self.worker.get("key")["value"] = 2
+        self.assertEqual(self.worker.get("key"), {"value": 1})
+
+    def test_invalidation_reaches_other_workers(self):
+        """Test an invalidation drops other L1s within the interval."""
+        self.worker.set("key", "value")
+        self.assertEqual(self.other_worker.get("key"), "value")
+        self.worker.invalidate("key")
+        self.assertIsNone(self.worker.get("key"))
+        time.sleep(TEST_CHECK_INTERVAL * 2)
+        self.assertIsNone(self.other_worker.get("key"))
+
+    def test_invalidation_with_values(self):
+        """Test an invalidation may publish new values at once."""
+        self.worker.set("key", "value")
+        self.other_worker.get("key")
+        self.worker.invalidate(values={"key": "new value"})
+        time.sleep(TEST_CHECK_INTERVAL * 2)
+        self.assertEqual(self.other_worker.get("key"), "new value")
+
+    def test_load_racing_invalidation_not_cached(self):
+        """Test a value loaded across an invalidation is not cached."""
+        def load():
+            self.other_worker.invalidate(values={"key": "new value"})
+            return "old value"
+
+        self.assertEqual(self.worker.get_or_load("key", load), "old value")
+        self.assertEqual(self.worker.get("key"), "new value")
+        self.worker.invalidate("key")
+        self.assertEqual(self.worker.get_or_load("key", lambda: "value"),
+                         "value")
+        self.assertEqual(self.other_worker.get("key"), "value")
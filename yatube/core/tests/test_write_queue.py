@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+
+from posts.models import Comment, Post
+
+from ..write_queue import WriteQueue
+
+User = get_user_model()
+
+
+class WriteQueueTest(TransactionTestCase):
+    def setUp(self) -> None:
+        self.author = User.objects.create_user(username="author")
+        self.post = Post.objects.create(
+            author=self.author, text="Тестовый пост",
+        )
+        self.write_queue = WriteQueue(max_batch=20, max_wait=0.05)
+
+    def test_concurrent_saves_get_own_rows(self):
+        """Test queued inserts of many threads get their own primary keys."""
+        comments = [
+            Comment(author=self.author, post=self.post, text=f"Текст {num}")
+            for num in range(20)
+        ]
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            list(executor.map(self.write_queue.save, comments))
+        for comment in comments:
+            with self.subTest(text=comment.text):
+                self.assertEqual(
+                    Comment.objects.get(pk=comment.pk).text, comment.text
+                )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, len(comments))
+
+    def test_failed_insert_reported_to_its_caller(self):
+        """Test one invalid instance does not fail the rest of the batch."""
+        comment = Comment(author=self.author, post=self.post, text="Текст")
+        broken = Comment(author=self.author, post_id=0, text="Текст")
+        futures = [
+            self.write_queue.submit(comment),
+            self.write_queue.submit(broken),
+        ]
+        self.assertEqual(futures[0].result(timeout=5), comment.pk)
+        self.assertIsNotNone(futures[1].exception(timeout=5))
+        self.assertTrue(Comment.objects.filter(pk=comment.pk).exists())
@@ -0,0 +1,188 @@
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from core.timing import timed
+
+
+STAMP_KEY = "l1:stamp:%s"
+
+
+def _new_stamp():
+    return uuid.uuid4().hex[:12]
+
+
+class TieredCache:
+    """
+    A small per-process L1 in front of the shared L2 cache.
+
+    L1 entries are kept pickled, so callers never share mutable
+    objects. Every namespace has a version stamp in L2, and
+    :meth:'invalidate' writes a new one; other processes compare
+    stamps at most every L1_CACHE['CHECK_INTERVAL'] seconds and drop
+    their whole L1 on a mismatch, which bounds how long they can
+    serve an invalidated entry.
+    """
+
+    def __init__(self, namespace, alias=DEFAULT_CACHE_ALIAS):
+        options = getattr(settings, "L1_CACHE", {})
+        self.namespace = namespace
+        self.alias = alias
+        self.max_entries = options.get("MAX_ENTRIES", 500)
+        self.timeout = options.get("TIMEOUT", 300)
+        self.check_interval = options.get("CHECK_INTERVAL", 1.0)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._checked_at = 0.0
+        self._clear_count = 0
+
+    def __repr__(self):
+        return "<TieredCache %s>" % self.namespace
+
+    @property
+    def l2(self):
+        return caches[self.alias]
+
+    def _l2_key(self, key):
+        return "%s:%s" % (self.namespace, key)
+
+    def _validate(self):
+        now = time.monotonic()
+        clear_count = getattr(self.l2, "clear_count", 0)
+        if clear_count != self._clear_count:
+            self._clear_count = clear_count
+            self._checked_at = 0.0
+        if now - self._checked_at < self.check_interval:
+            return
+        stamp_key = STAMP_KEY % self.namespace
+        stamp = self.l2.get(stamp_key)
+        if stamp is None:
+            self.l2.add(stamp_key, _new_stamp(), None)
+            stamp = self.l2.get(stamp_key)
+        with self._lock:
+            if stamp != self._stamp:
+                self._entries.clear()
+                self._stamp = stamp
+            self._checked_at = now
+
+    def _remember(self, key, data, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            timeout = self.timeout
+        expires = time.monotonic() + min(timeout, self.timeout)
+        with self._lock:
+            self._entries[key] = (data, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _recall(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    @timed("cache")
+    def get_many(self, keys):
+        self._validate()
+        found, missing = {}, []
+        for key in keys:
+            data = self._recall(key)
+            if data is None:
+                missing.append(key)
+            else:
+                found[key] = data
+        if missing:
+            l2_keys = {self._l2_key(key): key for key in missing}
+            for l2_key, data in self.l2.get_many(l2_keys).items():
+                key = l2_keys[l2_key]
+                self._remember(key, data, self.timeout)
+                found[key] = data
+        return {key: pickle.loads(data) for key, data in found.items()}
+
+    @timed("cache")
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    @timed("cache")
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT):
+        self._validate()
+        data = {
+            key: pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            for key, value in data.items()
+        }
+        self.l2.set_many(
+            {self._l2_key(key): value for key, value in data.items()},
+            timeout,
+        )
+        for key, value in data.items():
+            self._remember(key, value, timeout)
+
+    @timed("cache")
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.set_many({key: value}, timeout)
+
+    @timed("cache")
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.l2.add(
+            self._l2_key(key),
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            timeout,
+        )
+        with self._lock:
+            self._entries.pop(key, None)
+        return self.get(key)
+
+    @timed("cache")
+    def get_or_load(self, key, load, timeout=DEFAULT_TIMEOUT):
+        """
+        Returns the cached value of key, or what ``load()`` returns.
+        A loaded value is only added if no invalidation announced a new
+        stamp meanwhile, so a read racing a write can not cache the
+        object the write replaced.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        stamp_key = STAMP_KEY % self.namespace
+        stamp = self.l2.get(stamp_key)
+        value = load()
+        if value is not None and self.l2.get(stamp_key) == stamp:
+            self.add(key, value, timeout)
+        return value
+
+    @timed("cache")
+    def invalidate(self, *keys, values=None, timeout=DEFAULT_TIMEOUT):
+        """
+        Drops keys from both tiers, or overwrites them with ``values``,
+        then announces the change to the other processes.
+        """
+        if values is not None:
+            self.set_many(values, timeout)
+        if keys:
+            self.l2.delete_many([self._l2_key(key) for key in keys])
+        stamp = _new_stamp()
+        self.l2.set(STAMP_KEY % self.namespace, stamp, None)
+        with self._lock:
+            # Also forgets entries other processes invalidated since
+            # the last check, as the new stamp hides their change.
+            self._entries.clear()
+            self._stamp = stamp
+            self._checked_at = time.monotonic()
+
+    def clear_local(self):
+        with self._lock:
+            self._entries.clear()
+            self._stamp = None
+            self._checked_at = 0.0
@@ -0,0 +1,70 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+
+_current = ContextVar("request_timer", default=None)
+
+
+class RequestTimer:
+    """
+    Splits the time of a request between named phases. Phases
+    nest, and the time of an inner phase is left out of the outer
+    one, so the phases add up to the whole request.
+    """
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self._stack = []
+
+    def start(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def stop(self):
+        name, start, inner = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.totals[name] += elapsed - inner
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    @contextmanager
+    def phase(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        with self.phase("db"):
+            return execute(sql, params, many, context)
+
+
+@contextmanager
+def activate(timer):
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+def current():
+    """Returns the timer of the request being served, if any."""
+    return _current.get()
+
+
+def timed(name):
+    """Decorates a function to count its time to a request phase."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timer = _current.get()
+            if timer is None:
+                return func(*args, **kwargs)
+            with timer.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
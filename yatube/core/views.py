@@ -1,6 +1,10 @@
 from http import HTTPStatus
 
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from core.metrics import histograms, metrics_options, view_names
 
 
 def page_not_found(request, exception):
@@ -57,3 +61,23 @@ def csrf_failure(request, reason=""):
     :template:'core/403csrf.html'
     """
     return render(request, "core/403csrf.html")
+
+
+def metrics(request):
+    """
+    Exposes per-view latency histograms and phase totals in
+    Prometheus text format, to staff users and to scrapers with
+    the settings.REQUEST_METRICS['TOKEN'] bearer token.
+    """
+    token = metrics_options().get("TOKEN")
+    authorization = request.META.get("HTTP_AUTHORIZATION", "")
+    if not (
+        request.user.is_staff
+        or token and constant_time_compare(authorization, f"Bearer {token}")
+    ):
+        raise Http404
+    histograms.flush()
+    return HttpResponse(
+        histograms.render(view_names()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
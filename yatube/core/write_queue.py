@@ -0,0 +1,139 @@
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import router
+from django.db.models.signals import post_save, pre_save
+
+from core.db import retry_on_busy, save_with_retry
+
+
+class WriteQueue:
+    """
+    Routes inserts of new model instances through a single writer
+    thread per process. The thread drains up to ``max_batch`` pending
+    instances, waiting at most ``max_wait`` seconds for more to come,
+    and inserts them with one bulk_create per model in one transaction,
+    so concurrent requests stop fighting over the SQLite write lock.
+    """
+
+    def __init__(self, max_batch=100, max_wait=0.005):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        # Threads do not survive a fork of a preloading server.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name="write-queue", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, instance):
+        """Queues a new instance, the future resolves to its pk."""
+        future = Future()
+        self._ensure_thread()
+        self._queue.put((instance, future))
+        return future
+
+    def save(self, instance, timeout=None):
+        self.submit(instance).result(timeout)
+        return instance
+
+    def _drain(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._drain()
+            try:
+                self._write(batch)
+            except Exception:
+                # Keeps every caller's own error apart.
+                for instance, future in batch:
+                    self._write_one(instance, future)
+            else:
+                for instance, future in batch:
+                    future.set_result(instance.pk)
+
+    @retry_on_busy
+    def _write(self, batch):
+        by_model = defaultdict(list)
+        for instance, _ in batch:
+            by_model[type(instance)].append(instance)
+        for model, instances in by_model.items():
+            using = router.db_for_write(model)
+            for instance in instances:
+                instance.pk = None
+                pre_save.send(
+                    sender=model, instance=instance, raw=False,
+                    using=using, update_fields=None,
+                )
+            model._base_manager.bulk_create(instances)
+            # SQLite does not return ids of a bulk insert, but the
+            # writer holds the lock, so the newest rows are ours.
+            pks = model._base_manager.order_by("-pk").values_list(
+                "pk", flat=True
+            )[:len(instances)]
+            for instance, pk in zip(instances, reversed(list(pks))):
+                instance.pk = pk
+                instance._state.adding = False
+                instance._state.db = using
+            for instance in instances:
+                post_save.send(
+                    sender=model, instance=instance, created=True,
+                    update_fields=None, raw=False, using=using,
+                )
+
+    def _write_one(self, instance, future):
+        try:
+            instance.pk = None
+            instance._state.adding = True
+            save_with_retry(instance)
+        except Exception as error:
+            future.set_exception(error)
+        else:
+            future.set_result(instance.pk)
+
+
+def queue_options():
+    return getattr(settings, "WRITE_QUEUE", {})
+
+
+write_queue = WriteQueue(
+    max_batch=queue_options().get("MAX_BATCH", 100),
+    max_wait=queue_options().get("MAX_WAIT", 0.005),
+)
+
+
+def save_new(instance):
+    """
+    Inserts a new model instance through the write queue when
+    settings.WRITE_QUEUE['ENABLED'] is on, directly otherwise.
+    """
+    if queue_options().get("ENABLED"):
+        return write_queue.save(instance)
+    return save_with_retry(instance)
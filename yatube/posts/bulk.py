@@ -0,0 +1,25 @@
+from contextlib import contextmanager
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Lets bulk_create keep the given dates of auto_now_add fields."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def batches(rows, size):
+    """Splits an iterable into lists of at most size items."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,54 @@
+from posts.models import Post
+
+
+INDEX = "posts:index"
+GROUPS = "posts:groups"
+
+
+def group_tag(slug):
+    return "posts:group:%s" % slug
+
+
+def profile_tag(username):
+    return "posts:profile:%s" % username
+
+
+def post_tag(pk):
+    return "posts:post:%s" % pk
+
+
+def index_tags(*args, **kwargs):
+    return (INDEX,)
+
+
+def groups_tags(*args, **kwargs):
+    return (GROUPS,)
+
+
+def group_tags(slug, *args, **kwargs):
+    return (group_tag(slug),)
+
+
+def profile_tags(username, *args, **kwargs):
+    return (profile_tag(username),)
+
+
+def post_detail_tags(post_id, *args, **kwargs):
+    """Tags of a post page: its own, its author's and its group's."""
+    saved = Post.objects.filter(pk=post_id).values_list(
+        "group__slug", "author__username"
+    ).first()
+    tags = {post_tag(post_id)}
+    if saved:
+        tags |= post_tags(*saved) - {INDEX}
+    return tags
+
+
+def post_tags(group_slug, author_username):
+    """Tags of the list pages a post with these relations appears on."""
+    tags = {INDEX}
+    if group_slug:
+        tags.add(group_tag(group_slug))
+    if author_username:
+        tags.add(profile_tag(author_username))
+    return tags
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Comment, Follow, Post, UserStats
+
+
+User = get_user_model()
+USER_COUNTERS = {
+    "posts_count": (Post, "author"),
+    "followers_count": (Follow, "author"),
+    "following_count": (Follow, "user"),
+}
+
+
+def _count_subquery(model, field):
+    counts = model.objects.filter(**{field: OuterRef("pk")}).order_by()
+    counts = counts.values(field).annotate(total=Count("pk"))
+    return Coalesce(Subquery(counts.values("total")), 0)
+
+
+def bump_user(user_id, **deltas):
+    """Adds deltas to :model:'posts.UserStats' counters of the user."""
+    if user_id is None:
+        return
+    UserStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def bump_post(post_id, delta):
+    """Adds delta to the comment counter of :model:'posts.Post'."""
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F("comment_count") + delta
+    )
+
+
+def reconcile_users(users):
+    """
+    Recounts :model:'posts.UserStats' of the users,
+    returns the number of repaired rows.
+    """
+    users = users.annotate(**{
+        f"real_{field}": _count_subquery(model, lookup)
+        for field, (model, lookup) in USER_COUNTERS.items()
+    }).select_related("stats")
+    repaired, created = [], []
+    for user in users:
+        real = {
+            field: getattr(user, f"real_{field}")
+            for field in USER_COUNTERS
+        }
+        stats = getattr(user, "stats", None)
+        if stats is None:
+            created.append(UserStats(user=user, **real))
+        elif any(getattr(stats, field) != real[field] for field in real):
+            for field, value in real.items():
+                setattr(stats, field, value)
+            repaired.append(stats)
+    UserStats.objects.bulk_create(created, ignore_conflicts=True)
+    UserStats.objects.bulk_update(repaired, list(USER_COUNTERS))
+    return len(repaired) + len(created)
+
+
+def reconcile_posts(posts):
+    """
+    Recounts comments of :model:'posts.Post' instances,
+    returns the number of repaired rows.
+    """
+    posts = posts.annotate(
+        real_comment_count=_count_subquery(Comment, "post"),
+    ).only("pk", "comment_count")
+    repaired = []
+    for post in posts:
+        if post.comment_count != post.real_comment_count:
+            post.comment_count = post.real_comment_count
+            repaired.append(post)
+    Post.objects.bulk_update(repaired, ["comment_count"])
+    return len(repaired)
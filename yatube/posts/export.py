@@ -0,0 +1,67 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from posts.models import Comment, Follow, Group, Post
+
+
+CHUNK_SIZE = 2000
+# gzip framing for zlib.compressobj.
+GZIP_WBITS = 31
+EXPORTS = {
+    "posts": (
+        Post,
+        ("id", "text", "pub_date", "author_id", "group_id", "image"),
+    ),
+    "comments": (
+        Comment,
+        ("id", "post_id", "author_id", "text", "created"),
+    ),
+    "follows": (Follow, ("id", "user_id", "author_id")),
+    "groups": (Group, ("id", "title", "slug", "description")),
+}
+
+
+def rows(name, chunk_size=CHUNK_SIZE):
+    """
+    Yields the rows of an export as dicts, reading the table in
+    primary key order one chunk at a time, so memory use does not
+    grow with the table.
+    """
+    model, fields = EXPORTS[name]
+    queryset = model.objects.order_by("pk").values(*fields)
+    last_pk = 0
+    while True:
+        chunk = queryset.filter(pk__gt=last_pk)[:chunk_size]
+        count = 0
+        for row in chunk.iterator(chunk_size=chunk_size):
+            count += 1
+            last_pk = row["id"]
+            yield row
+        if count < chunk_size:
+            return
+
+
+def jsonl(name, chunk_size=CHUNK_SIZE):
+    """Yields an export as JSON lines, one encoded chunk at a time."""
+    lines = []
+    for row in rows(name, chunk_size):
+        lines.append(
+            json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+        )
+        if len(lines) == chunk_size:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def gzipped(chunks):
+    """Compresses a stream of bytes into a gzip stream on the fly."""
+    compressor = zlib.compressobj(wbits=GZIP_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,98 @@
+from django.contrib.syndication.views import Feed
+from django.template.defaultfilters import truncatechars
+from django.urls import reverse, reverse_lazy
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+
+from posts.lookups import get_author_or_404, get_group_or_404
+from posts.models import Post
+
+
+FEED_SIZE = 20
+TITLE_LENGTH = 60
+FEED_TYPES = {
+    "rss": Rss201rev2Feed,
+    "atom": Atom1Feed,
+}
+
+
+def feed_type(request):
+    """Returns the feed format asked for with '?format=', RSS by default."""
+    return FEED_TYPES.get(request.GET.get("format"), Rss201rev2Feed)
+
+
+class PostsFeed(Feed):
+    """The latest :model:'posts.Post' instances of the site."""
+
+    title = "Yatube: последние записи"
+    link = reverse_lazy("posts:index")
+    description = "Последние записи всех авторов Yatube."
+
+    def __init__(self, feed_type=Rss201rev2Feed):
+        self.feed_type = feed_type
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr("description", obj)
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).select_related("author", "group")[:FEED_SIZE]
+
+    def item_title(self, post):
+        return truncatechars(post.text, TITLE_LENGTH)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse("posts:post_detail", args=(post.pk,))
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_author_name(self, post):
+        if post.author is None:
+            return None
+        return post.author.get_full_name() or post.author.username
+
+    def item_categories(self, post):
+        return (post.group.title,) if post.group_id else ()
+
+
+class GroupFeed(PostsFeed):
+    """The latest :model:'posts.Post' instances of a group."""
+
+    def get_object(self, request, slug):
+        return get_group_or_404(slug)
+
+    def title(self, group):
+        return f"Yatube: {group.title}"
+
+    def link(self, group):
+        return reverse("posts:group_list", args=(group.slug,))
+
+    def description(self, group):
+        return group.description
+
+    def posts(self, group):
+        return group.posts.all()
+
+
+class AuthorFeed(PostsFeed):
+    """The latest :model:'posts.Post' instances of an author."""
+
+    def get_object(self, request, username):
+        return get_author_or_404(username)
+
+    def title(self, author):
+        return f"Yatube: {author.get_full_name() or author.username}"
+
+    def link(self, author):
+        return reverse("posts:profile", args=(author.username,))
+
+    def description(self, author):
+        return f"Записи пользователя {author.username}."
+
+    def posts(self, author):
+        return author.posts.all()
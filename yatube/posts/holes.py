@@ -0,0 +1,37 @@
+from django.template.loader import render_to_string
+
+from core import holes
+from posts.forms import CommentForm
+from posts.models import Follow
+
+
+@holes.register("switcher")
+def switcher(request, index=None, follow=None):
+    return render_to_string(
+        "posts/includes/switcher.html",
+        {"index": index, "follow": follow},
+        request=request,
+    )
+
+
+@holes.register("follow_button")
+def follow_button(request, username):
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author__username=username
+    ).exists()
+    return render_to_string(
+        "posts/includes/follow_button.html",
+        {"username": username, "following": following},
+        request=request,
+    )
+
+
+@holes.register("comment_form")
+def comment_form(request, post_id):
+    if not request.user.is_authenticated:
+        return ""
+    return render_to_string(
+        "posts/includes/comment_form.html",
+        {"post_id": post_id, "form": CommentForm()},
+        request=request,
+    )
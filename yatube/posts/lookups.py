@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.http import Http404
+
+from core.tiered_cache import TieredCache
+from posts.models import Group
+
+
+User = get_user_model()
+LOOKUP_TIMEOUT = 60 * 60
+# What the views show of an author, the password hash stays out.
+AUTHOR_FIELDS = ("id", "username", "first_name", "last_name")
+groups = TieredCache("groups")
+authors = TieredCache("authors")
+
+
+def _get_or_404(tiered_cache, queryset, **lookup):
+    (key,) = lookup.values()
+    obj = tiered_cache.get_or_load(
+        key, queryset.filter(**lookup).first, LOOKUP_TIMEOUT
+    )
+    if obj is None:
+        raise Http404("No %s matches the given query." % (
+            queryset.model._meta.object_name
+        ))
+    return obj
+
+
+def get_group_or_404(slug):
+    """Returns :model:'posts.Group' by slug, served from L1/L2 cache."""
+    return _get_or_404(groups, Group.objects.all(), slug=slug)
+
+
+def get_author_or_404(username):
+    """Returns :model:'posts.User' by username, served from L1/L2 cache."""
+    return _get_or_404(
+        authors, User.objects.only(*AUTHOR_FIELDS), username=username
+    )
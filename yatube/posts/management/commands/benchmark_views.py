@@ -0,0 +1,217 @@
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.queries import QueryLog
+from posts.models import Group, Post, UserStats
+
+
+SIZES = "1000,10000,100000"
+REQUESTS = 20
+# Users, groups and comments generated along with every post.
+USERS_PER_POST = 0.1
+GROUPS_PER_POST = 0.001
+COMMENTS_PER_POST = 1
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Times index, group_posts, profile, post_detail, follow_index "
+        "and their JSON API counterparts with cold and warm caches "
+        "on generated datasets of growing size, in a scratch database "
+        "and cache, and saves the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default=SIZES,
+            help="Comma separated numbers of posts, ascending.",
+        )
+        parser.add_argument("--requests", type=int, default=REQUESTS)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="JSON file, benchmark-<time>.json by default.",
+        )
+        parser.add_argument(
+            "--compare",
+            default=None,
+            help="A previous JSON file to print the change against.",
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(","))
+        directory = tempfile.mkdtemp()
+        old_name = connection.settings_dict["NAME"]
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(
+            directory, "benchmark.sqlite3"
+        )
+        scratch_cache = override_settings(CACHES={
+            "default": {
+                "BACKEND": "core.cache_backends.SQLiteCache",
+                "LOCATION": os.path.join(directory, "cache.sqlite3"),
+            },
+        })
+        setup_test_environment()
+        scratch_cache.enable()
+        try:
+            test_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                results = self.run(sizes, options)
+            finally:
+                # Only ever drop the scratch database created above.
+                if settings.DATABASES["default"]["NAME"] == test_name:
+                    connection.creation.destroy_test_db(
+                        old_name, verbosity=0
+                    )
+        finally:
+            scratch_cache.disable()
+            teardown_test_environment()
+            shutil.rmtree(directory, ignore_errors=True)
+        report = {
+            "created": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "requests": options["requests"],
+            "results": results,
+        }
+        output = options["output"] or (
+            f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        )
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Saved results to {output}."))
+        if options["compare"]:
+            self.compare(options["compare"], results)
+
+    def run(self, sizes, options):
+        results = []
+        generated = 0
+        for size in sizes:
+            added = size - generated
+            call_command(
+                "generate_dataset",
+                posts=added,
+                users=max(1, int(added * USERS_PER_POST)),
+                groups=max(1, int(added * GROUPS_PER_POST)),
+                comments=int(added * COMMENTS_PER_POST),
+                seed=options["seed"] + size,
+                stdout=self.stdout,
+            )
+            generated = size
+            for view, url, user in self.targets():
+                for mode in ("cold", "warm"):
+                    timing = self.measure(
+                        url, user, options["requests"], cold=mode == "cold"
+                    )
+                    results.append({
+                        "size": size, "view": view, "mode": mode, **timing,
+                    })
+                    self.stdout.write(
+                        f"{size:>9} {view:<13} {mode}: "
+                        f"p50 {timing['p50_ms']:8.2f} ms, "
+                        f"p95 {timing['p95_ms']:8.2f} ms, "
+                        f"{timing['queries']} queries"
+                    )
+        return results
+
+    def targets(self):
+        """The busiest page of every view, where it is slowest."""
+        group = Group.objects.annotate(
+            total=Count("posts")
+        ).order_by("-total").first()
+        author = UserStats.objects.select_related("user").order_by(
+            "-posts_count"
+        ).first().user
+        follower = UserStats.objects.select_related("user").order_by(
+            "-following_count"
+        ).first().user
+        post = Post.objects.order_by("-comment_count").first()
+        return (
+            ("index", reverse("posts:index"), None),
+            ("group_posts", reverse("posts:group_list", args=(group.slug,)),
+             None),
+            ("profile", reverse("posts:profile", args=(author.username,)),
+             None),
+            ("post_detail", reverse("posts:post_detail", args=(post.pk,)),
+             None),
+            ("follow_index", reverse("posts:follow_index"), follower),
+            ("api_posts", reverse("api:posts"), None),
+            ("api_group_posts",
+             reverse("api:group_posts", args=(group.slug,)), None),
+            ("api_profile_posts",
+             reverse("api:profile_posts", args=(author.username,)), None),
+            ("api_comments", reverse("api:comments", args=(post.pk,)),
+             None),
+            ("api_follow", reverse("api:follow"), follower),
+        )
+
+    def measure(self, url, user, requests, cold):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        client.get(url)
+        durations = []
+        for _ in range(requests):
+            if cold:
+                cache.clear()
+            with QueryLog() as log:
+                started = time.perf_counter()
+                response = client.get(url)
+                durations.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise AssertionError(f"{url} answered {response.status_code}")
+        return {
+            "url": url,
+            "p50_ms": round(statistics.median(durations), 3),
+            "p95_ms": round(percentile(durations, 0.95), 3),
+            "mean_ms": round(statistics.mean(durations), 3),
+            "queries": len(log),
+        }
+
+    def compare(self, path, results):
+        with open(path) as file:
+            previous = {
+                (row["size"], row["view"], row["mode"]): row
+                for row in json.load(file)["results"]
+            }
+        for row in results:
+            old = previous.get((row["size"], row["view"], row["mode"]))
+            if old is None:
+                continue
+            change = (row["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100
+            self.stdout.write(
+                f"{row['size']:>9} {row['view']:<13} {row['mode']}: "
+                f"p50 {old['p50_ms']:8.2f} -> {row['p50_ms']:8.2f} ms "
+                f"({change:+.1f}%)"
+            )
@@ -0,0 +1,53 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports posts, comments, follows and groups as JSON lines, "
+        "reading the tables in chunks, so memory use stays flat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            help="Exports to write out of %s, all by default." % ", ".join(
+                export.EXPORTS
+            ),
+        )
+        parser.add_argument(
+            "--output",
+            default=".",
+            help="Directory for <name>.jsonl files, '-' for stdout.",
+        )
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument(
+            "--chunk-size", type=int, default=export.CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["names"]) - set(export.EXPORTS)
+        if unknown:
+            raise CommandError(f"Unknown exports: {', '.join(unknown)}.")
+        for name in options["names"] or export.EXPORTS:
+            chunks = export.jsonl(name, options["chunk_size"])
+            if options["gzip"]:
+                chunks = export.gzipped(chunks)
+            if options["output"] == "-":
+                for chunk in chunks:
+                    sys.stdout.buffer.write(chunk)
+                sys.stdout.buffer.flush()
+                continue
+            path = os.path.join(
+                options["output"],
+                f"{name}.jsonl" + (".gz" if options["gzip"] else ""),
+            )
+            with open(path, "wb") as file:
+                for chunk in chunks:
+                    file.write(chunk)
+            self.stderr.write(f"Exported {name} to {path}.")
@@ -0,0 +1,217 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts import timeline
+from posts.bulk import batches, explicit_dates
+from posts.models import Comment, Follow, Group, Post
+
+
+User = get_user_model()
+BATCH_SIZE = 5000
+SENTENCES = 2000
+# Shape of the out-degree distribution: a few users follow hundreds.
+PARETO_SHAPE = 1.5
+PASSWORD = "password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generates users, groups, posts, comments and a power-law "
+        "follow graph on top of the existing data, then fills the "
+        "timelines and counters the generated rows skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--groups", type=int, default=100)
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--comments", type=int, default=100000)
+        parser.add_argument(
+            "--follows",
+            type=int,
+            default=20,
+            help="Average number of authors a new user follows.",
+        )
+        parser.add_argument(
+            "--alpha",
+            type=float,
+            default=1.1,
+            help="Zipf exponent of author popularity and activity.",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        self.days = options["days"]
+        faker = Faker("ru_RU")
+        faker.seed_instance(options["seed"])
+        self.sentences = [faker.sentence() for _ in range(SENTENCES)]
+        self.faker = faker
+
+        started = time.monotonic()
+        first_post = self.last_pk(Post) + 1
+        first_follow = self.last_pk(Follow) + 1
+        user_ids = self.create_users(options["users"])
+        group_ids = self.create_groups(options["groups"])
+        # Users ranked by Zipf weights: the first are followed the
+        # most. Posting activity follows its own ranking, tying the
+        # two would make every feed the same few authors.
+        weights = list(accumulate(
+            1 / (rank + 1) ** options["alpha"]
+            for rank in range(len(user_ids))
+        ))
+        posters = self.rng.sample(user_ids, len(user_ids))
+        self.create_posts(options["posts"], posters, weights, group_ids)
+        self.create_comments(options["comments"], user_ids, first_post)
+        self.create_follows(options["follows"], user_ids, weights)
+        self.fill_timelines(first_post, first_follow)
+        call_command("reconcile_counters", stdout=self.stdout)
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated the dataset in {time.monotonic() - started:.1f} s."
+        ))
+
+    @staticmethod
+    def last_pk(model):
+        return model.objects.order_by("-pk").values_list(
+            "pk", flat=True
+        ).first() or 0
+
+    def random_date(self):
+        return self.now - timedelta(
+            seconds=self.rng.uniform(0, self.days * 24 * 60 * 60)
+        )
+
+    def text(self):
+        count = self.rng.randint(1, 6)
+        return " ".join(self.rng.choices(self.sentences, k=count))
+
+    def insert(self, model, rows, **kwargs):
+        started = time.monotonic()
+        total = 0
+        for batch in batches(rows, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, **kwargs)
+            total += len(batch)
+        spent = time.monotonic() - started
+        self.stdout.write(
+            f"{model._meta.model_name}: {total} rows "
+            f"in {spent:.1f} s, {total / max(spent, 1e-9):.0f} rows/s"
+        )
+
+    def create_users(self, count):
+        first = self.last_pk(User) + 1
+        password = make_password(PASSWORD)
+        self.insert(
+            User,
+            (
+                User(
+                    username=f"user{first + num}",
+                    first_name=self.faker.first_name(),
+                    last_name=self.faker.last_name(),
+                    password=password,
+                )
+                for num in range(count)
+            ),
+            ignore_conflicts=True,
+        )
+        return list(
+            User.objects.filter(pk__gte=first).order_by("pk").values_list(
+                "pk", flat=True
+            )
+        )
+
+    def create_groups(self, count):
+        first = self.last_pk(Group) + 1
+        self.insert(
+            Group,
+            (
+                Group(
+                    title=self.faker.catch_phrase()[:200],
+                    slug=f"group-{first + num}",
+                    description=self.text(),
+                )
+                for num in range(count)
+            ),
+            ignore_conflicts=True,
+        )
+        return list(Group.objects.values_list("pk", flat=True))
+
+    def create_posts(self, count, user_ids, weights, group_ids):
+        pub_date = Post._meta.get_field("pub_date")
+        with explicit_dates(pub_date):
+            self.insert(Post, (
+                Post(
+                    author_id=self.rng.choices(
+                        user_ids, cum_weights=weights
+                    )[0],
+                    group_id=(
+                        self.rng.choice(group_ids)
+                        if group_ids and self.rng.random() < 0.5 else None
+                    ),
+                    text=self.text(),
+                    pub_date=self.random_date(),
+                )
+                for _ in range(count)
+            ))
+
+    def create_comments(self, count, user_ids, first_post):
+        last_post = self.last_pk(Post)
+        if last_post < first_post:
+            return
+        created = Comment._meta.get_field("created")
+        with explicit_dates(created):
+            self.insert(Comment, (
+                Comment(
+                    post_id=self.rng.randint(first_post, last_post),
+                    author_id=self.rng.choice(user_ids),
+                    text=self.rng.choice(self.sentences),
+                    created=self.random_date(),
+                )
+                for _ in range(count)
+            ))
+
+    def create_follows(self, average, user_ids, weights):
+        scale = average * (PARETO_SHAPE - 1) / PARETO_SHAPE
+
+        def follows():
+            for user_id in user_ids:
+                degree = min(
+                    int(self.rng.paretovariate(PARETO_SHAPE) * scale),
+                    len(user_ids) - 1,
+                )
+                authors = set(self.rng.choices(
+                    user_ids, cum_weights=weights, k=degree
+                ))
+                authors.discard(user_id)
+                for author_id in authors:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        self.insert(Follow, follows(), ignore_conflicts=True)
+
+    def fill_timelines(self, first_post, first_follow):
+        """Fans new posts and follows out as the signals would have."""
+        started = time.monotonic()
+        with transaction.atomic():
+            total = timeline.backfill_follows_since(first_follow)
+            total += timeline.fan_out_posts_since(first_post)
+        spent = time.monotonic() - started
+        self.stdout.write(
+            f"timeline: {total} rows in {spent:.1f} s, "
+            f"{total / max(spent, 1e-9):.0f} rows/s"
+        )
@@ -0,0 +1,40 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-generates the card and detail thumbnails of every post image "
+        "in a process pool, so no request renders them lazily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Worker processes, settings.POSTS_THUMBNAILS by default.",
+        )
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image="").order_by().values_list(
+            "image", flat=True
+        ).distinct()
+        pool = thumbnails.get_pool(options["workers"])
+        futures = [
+            pool.submit(thumbnails.generate, name)
+            for name in names.iterator()
+        ]
+        failed = 0
+        for future in as_completed(futures):
+            if future.exception() is not None:
+                failed += 1
+                self.stderr.write(str(future.exception()))
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated thumbnails of {len(futures) - failed} images, "
+            f"{failed} failed."
+        ))
@@ -0,0 +1,249 @@
+import json
+import os
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.page_cache import invalidate_tags
+from posts import cache_tags, counters, thumbnails, timeline
+from posts.bulk import explicit_dates
+from posts.forms import PostForm
+from posts.models import Group, ImportCheckpoint, Post
+
+
+User = get_user_model()
+BATCH_SIZE = 2000
+REPORT_EVERY = 10
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports posts from a JSONL file, one object with 'text', "
+        "'author' or 'author_id', optional 'group' or 'group_id', "
+        "'pub_date' and 'image' per line, in batched transactions. "
+        "Images are validated, copied and thumbnailed in a process pool. "
+        "An interrupted import resumes from the checkpoint saved "
+        "with every batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The JSONL file to import.")
+        parser.add_argument(
+            "--images",
+            default=None,
+            help="Directory the 'image' paths are relative to.",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Image worker processes, settings.POSTS_THUMBNAILS "
+                 "by default.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=None,
+            help="Checkpoint name, the real path of the file by default.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint and import from the start.",
+        )
+
+    def handle(self, *args, **options):
+        self.images = options["images"] and os.path.realpath(
+            options["images"]
+        )
+        self.authors = {}
+        self.groups = {}
+        self.text_field = PostForm.base_fields["text"]
+        self.model_text_field = Post._meta.get_field("text")
+        self.checkpoint = options["checkpoint"] or os.path.realpath(
+            options["path"]
+        )
+        checkpoints = ImportCheckpoint.objects.filter(source=self.checkpoint)
+        if options["restart"]:
+            checkpoints.delete()
+        state = checkpoints.values("offset", "imported", "rejected").first()
+        if state is None:
+            state = {"offset": 0, "imported": 0, "rejected": 0}
+        else:
+            self.stdout.write(
+                f"Resuming after {state['imported']} imported rows."
+            )
+        pool = thumbnails.get_pool(options["workers"])
+        started = time.monotonic()
+        imported_before = state["imported"]
+        batch_count = 0
+        with open(options["path"], "rb") as source:
+            source.seek(state["offset"])
+            pending = None
+            while True:
+                batch = self.read_batch(source, options["batch_size"])
+                # Images of the next batch are copied while this one
+                # is written.
+                upcoming = batch and (batch, source.tell(), [
+                    pool.submit(thumbnails.import_image, row["image_path"])
+                    if row.get("image_path") else None
+                    for row in batch["rows"]
+                ])
+                if pending:
+                    self.write_batch(*pending, state)
+                    batch_count += 1
+                    if batch_count % REPORT_EVERY == 0:
+                        self.report(state, imported_before, started)
+                if not upcoming:
+                    break
+                pending = upcoming
+        checkpoints.delete()
+        self.report(state, imported_before, started, final=True)
+
+    def read_batch(self, source, size):
+        rows, rejected = [], []
+        for line in source:
+            try:
+                rows.append(self.parse(json.loads(line)))
+            except (ValueError, ValidationError, KeyError) as error:
+                rejected.append(f"{line[:80]!r}: {error}")
+            if len(rows) + len(rejected) == size:
+                break
+        if not rows and not rejected:
+            return None
+        # Rows are checked before their images are copied, so rejected
+        # rows leave no files behind.
+        self.resolve(rows)
+        known = []
+        for row in rows:
+            author = self.authors.get(row["author"])
+            group = self.groups.get(row["group"])
+            if author is None or row["group"] is not None and group is None:
+                rejected.append(
+                    f"unknown author {row['author']!r} "
+                    f"or group {row['group']!r}"
+                )
+                continue
+            row["author"], row["group"] = author, group
+            known.append(row)
+        return {"rows": known, "rejected": rejected}
+
+    def parse(self, data):
+        """Checks a row with the rules of PostForm and Post.text."""
+        text = self.text_field.clean(data.get("text"))
+        self.model_text_field.run_validators(text)
+        row = {
+            "text": text,
+            "author": data.get("author_id") or data["author"],
+            "group": data.get("group_id") or data.get("group"),
+            "pub_date": None,
+            "image_path": None,
+        }
+        if data.get("pub_date"):
+            row["pub_date"] = parse_datetime(data["pub_date"])
+            if row["pub_date"] is None:
+                raise ValidationError(f"Bad pub_date {data['pub_date']}")
+        if data.get("image"):
+            if self.images is None:
+                raise ValidationError("Images need --images.")
+            path = os.path.realpath(os.path.join(self.images, data["image"]))
+            if os.path.commonpath((path, self.images)) != self.images:
+                raise ValidationError(f"Image outside --images: {path}")
+            row["image_path"] = path
+        return row
+
+    def resolve(self, rows):
+        """Looks new authors and groups of a batch up in bulk."""
+        for cache, model, lookup in (
+            (self.authors, User, "username"),
+            (self.groups, Group, "slug"),
+        ):
+            field = "author" if model is User else "group"
+            missing = {
+                row[field] for row in rows
+                if row[field] is not None and row[field] not in cache
+            }
+            names = {key for key in missing if isinstance(key, str)}
+            ids = missing - names
+            if ids:
+                for pk, name in model.objects.filter(
+                    pk__in=ids
+                ).values_list("pk", lookup):
+                    cache[pk] = (pk, name)
+            if names:
+                for pk, name in model.objects.filter(
+                    **{f"{lookup}__in": names}
+                ).values_list("pk", lookup):
+                    cache[name] = (pk, name)
+
+    def write_batch(self, batch, offset, futures, state):
+        posts, authors, groups = [], Counter(), set()
+        rejected = list(batch["rejected"])
+        now = timezone.now()
+        for row, future in zip(batch["rows"], futures):
+            author, group = row["author"], row["group"]
+            post = Post(
+                text=row["text"],
+                author_id=author[0],
+                group_id=group and group[0],
+                pub_date=row["pub_date"] or now,
+            )
+            if future is not None:
+                image = future.result()
+                if "error" in image:
+                    rejected.append(image["error"])
+                    continue
+                post.image = image["name"]
+                (
+                    post.image_width,
+                    post.image_height,
+                    post.image_format,
+                ) = image["info"]
+            posts.append(post)
+            authors[author] += 1
+            if group:
+                groups.add(group[1])
+        with transaction.atomic():
+            with explicit_dates(Post._meta.get_field("pub_date")):
+                Post.objects.bulk_create(posts)
+            if posts:
+                first_post = Post.objects.order_by("-pk").values_list(
+                    "pk", flat=True
+                )[len(posts) - 1]
+                timeline.fan_out_posts_since(first_post)
+            for (author_id, _), count in authors.items():
+                counters.bump_user(author_id, posts_count=count)
+            state["offset"] = offset
+            state["imported"] += len(posts)
+            state["rejected"] += len(rejected)
+            ImportCheckpoint.objects.update_or_create(
+                source=self.checkpoint, defaults=state
+            )
+        invalidate_tags(
+            cache_tags.INDEX,
+            *(cache_tags.group_tag(slug) for slug in groups),
+            *(cache_tags.profile_tag(name) for _, name in authors),
+        )
+        for message in rejected:
+            self.stderr.write(f"Rejected {message}")
+
+    def report(self, state, imported_before, started, final=False):
+        spent = time.monotonic() - started
+        imported = state["imported"] - imported_before
+        message = (
+            f"{state['imported']} imported, {state['rejected']} rejected, "
+            f"{imported / max(spent, 1e-9):.0f} rows/s"
+        )
+        if final:
+            if not state["imported"] and state["rejected"]:
+                raise CommandError(message)
+            message = self.style.SUCCESS(
+                f"Done in {spent:.1f} s: {message}."
+            )
+        self.stdout.write(message)
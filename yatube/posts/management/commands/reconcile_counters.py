@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters
+from posts.models import Post
+
+
+User = get_user_model()
+BATCH_SIZE = 1000
+
+
+def pk_batches(queryset, batch_size):
+    """Yields querysets of consecutive primary key ranges."""
+    last_pk = 0
+    while True:
+        pks = list(
+            queryset.filter(pk__gt=last_pk).order_by("pk").values_list(
+                "pk", flat=True
+            )[:batch_size]
+        )
+        if not pks:
+            return
+        yield queryset.filter(pk__gte=pks[0], pk__lte=pks[-1])
+        last_pk = pks[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts posts, followers and followings of users and comments "
+        "of posts, repairing the denormalized counters in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Rows recounted in one transaction.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        repaired_users = repaired_posts = 0
+        for users in pk_batches(User.objects.all(), batch_size):
+            with transaction.atomic():
+                repaired_users += counters.reconcile_users(users)
+        for posts in pk_batches(Post.objects.all(), batch_size):
+            with transaction.atomic():
+                repaired_posts += counters.reconcile_posts(posts)
+        self.stdout.write(self.style.SUCCESS(
+            f"Repaired {repaired_users} user and {repaired_posts} post "
+            f"counters."
+        ))
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:23
+
+from django.db import migrations, models
+
+
+def image_info(image):
+    """Returns width, height and format of an image file, or Nones."""
+    from PIL import Image
+
+    try:
+        with Image.open(image) as source:
+            return (*source.size, source.format or '')
+    except (OSError, ValueError):
+        return (None, None, '')
+
+
+def fill_image_info(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    for post in Post.objects.exclude(image='').iterator():
+        try:
+            post.image.open()
+        except OSError:
+            continue
+        with post.image:
+            info = image_info(post.image)
+        Post.objects.filter(pk=post.pk).update(
+            image_width=info[0],
+            image_height=info[1],
+            image_format=info[2],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_format',
+            field=models.CharField(blank=True, editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_image_info, migrations.RunPython.noop),
+    ]
@@ -45,11 +45,34 @@ class Post(models.Model):
         upload_to="posts/",
         blank=True,
     )
+    # Read once on upload, so pages never open the source image.
+    image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    image_format = models.CharField(max_length=10, blank=True, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ("-pub_date",)
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
+        indexes = (
+            models.Index(
+                fields=("-pub_date",),
+                name="post_pub_date_idx",
+            ),
+            models.Index(
+                fields=("author", "-pub_date"),
+                name="post_author_pub_date_idx",
+            ),
+            models.Index(
+                fields=("group", "-pub_date"),
+                name="post_group_pub_date_idx",
+            ),
+        )
 
     def __str__(self) -> str:
         return str(self.text[:TEXT_LENGTH])
@@ -75,6 +98,14 @@ class Comment(models.Model):
         null=True,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=("post", "created"),
+                name="comment_post_created_idx",
+            ),
+        )
+
 
 class Follow(models.Model):
     """
@@ -93,3 +124,92 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name="following",
     )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "author"),
+                name="unique_follow",
+            ),
+        )
+
+
+class UserStats(models.Model):
+    """
+    Stores denormalized counters of :model:'posts.User':
+    posts written, followers and followed authors.
+    Kept current by signals, repaired by reconcile_counters.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return str(self.user)
+
+
+class Timeline(models.Model):
+    """
+    Stores a materialized feed of :model:'posts.Post' instances
+    for every :model:'posts.User' follower. Filled on write,
+    so :view:'posts.follow_index' reads a single indexed range.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ("-pub_date",)
+        indexes = (
+            models.Index(
+                fields=("user", "-pub_date", "-post"),
+                name="timeline_user_feed_idx",
+            ),
+            models.Index(
+                fields=("user", "author"),
+                name="timeline_user_author_idx",
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "post"),
+                name="unique_timeline_post",
+            ),
+        )
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Stores how far import_posts got through a source file. Saved
+    in the transaction of every batch, so a resumed import neither
+    repeats nor skips rows.
+    """
+
+    source = models.CharField(max_length=255, unique=True)
+    offset = models.BigIntegerField(default=0)
+    imported = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return self.source
@@ -0,0 +1,128 @@
+import base64
+import binascii
+from collections.abc import Sequence
+from datetime import datetime
+
+from django.db.models import Q
+
+
+CURSOR_ORDERING = ("pub_date", "pk")
+
+
+def encode_cursor(obj, attrs=CURSOR_ORDERING):
+    """Pack the (date, id) pair of an object into an url-safe token."""
+    date_attr, id_attr = attrs
+    date, pk = getattr(obj, date_attr), getattr(obj, id_attr)
+    raw = "%s|%s" % (date.isoformat(), pk)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Unpack a token, returns None for anything malformed."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        date, pk = raw.decode().split("|")
+        return datetime.fromisoformat(date), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class CursorPage(Sequence):
+    """
+    A page of objects fetched with keyset pagination.
+    Mimics the parts of :class:'django.core.paginator.Page'
+    used by the templates, without COUNT(*) and OFFSET.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return "<CursorPage of %s objects>" % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginates a queryset on a (date, id) key, newest first,
+    or oldest first with ``descending=False``.
+    ``ordering`` holds the lookups to filter and order by,
+    ``attrs`` the matching attributes of the fetched objects.
+    ``scope`` is a condition on the same multi-valued relation as
+    ``ordering``; it goes into the same filter() as the seek, so both
+    constrain one JOIN instead of duplicating rows through two.
+    """
+
+    def __init__(
+        self,
+        object_list,
+        per_page,
+        ordering=CURSOR_ORDERING,
+        attrs=None,
+        descending=True,
+        scope=None,
+    ):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.ordering = ordering
+        self.attrs = attrs or ordering
+        self.descending = descending
+        self.scope = scope or Q()
+
+    def _seek(self, key, forward):
+        date_lookup, id_lookup = self.ordering
+        date, pk = key
+        suffix = "lt" if forward == self.descending else "gt"
+        return Q(**{f"{date_lookup}__{suffix}": date}) | Q(
+            **{date_lookup: date, f"{id_lookup}__{suffix}": pk}
+        )
+
+    def _order(self, forward):
+        prefix = "-" if forward == self.descending else ""
+        return [prefix + lookup for lookup in self.ordering]
+
+    def get_page(self, after=None, before=None):
+        """Returns the page following ``after`` or preceding ``before``."""
+        after, before = decode_cursor(after), decode_cursor(before)
+        condition = self.scope
+        if before is not None:
+            condition &= self._seek(before, forward=False)
+        elif after is not None:
+            condition &= self._seek(after, forward=True)
+        queryset = self.object_list.filter(condition).order_by(
+            *self._order(forward=before is None)
+        )
+        objects = list(queryset[:self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if before is not None:
+            objects.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = after is not None, has_more
+        next_cursor = previous_cursor = None
+        if objects and has_next:
+            next_cursor = encode_cursor(objects[-1], self.attrs)
+        if objects and has_previous:
+            previous_cursor = encode_cursor(objects[0], self.attrs)
+        return CursorPage(objects, next_cursor, previous_cursor)
@@ -0,0 +1,69 @@
+import re
+
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from posts.models import Post
+
+
+MARK_START = "\x02"
+MARK_END = "\x03"
+SNIPPET_TOKENS = 24
+WORD = re.compile(r"\w+")
+
+
+def fts_query(query):
+    """
+    Turns user input into an FTS5 query matching all of its words,
+    so operators and quotes in it cannot break the MATCH syntax.
+    """
+    return " ".join(f'"{word}"' for word in WORD.findall(query))
+
+
+def matching_ids(query):
+    """
+    Returns a subquery of ids of posts matching a search query,
+    or no ids for a query without words, which MATCH rejects.
+    """
+    match = fts_query(query)
+    if not match:
+        return ()
+    return RawSQL(
+        "SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s",
+        (match,),
+    )
+
+
+def search_posts(query):
+    """
+    Returns posts matching a search query, best first, annotated
+    with a 'snippet' of the text around the matched words.
+    """
+    match = fts_query(query)
+    if not match:
+        return Post.objects.none()
+    return Post.objects.extra(
+        select={
+            "snippet": (
+                "snippet(posts_post_fts, 0, %s, %s, '…', %s)"
+            ),
+        },
+        select_params=(MARK_START, MARK_END, SNIPPET_TOKENS),
+        tables=("posts_post_fts",),
+        where=(
+            "posts_post_fts.rowid = posts_post.id",
+            "posts_post_fts MATCH %s",
+        ),
+        params=(match,),
+        order_by=("posts_post_fts.rank",),
+    )
+
+
+def highlight(snippet):
+    """Escapes a snippet and marks up its matched words."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, "<mark>")
+        .replace(MARK_END, "</mark>")
+    )
@@ -0,0 +1,226 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from core.page_cache import invalidate_tags
+from posts import cache_tags, counters, lookups, thumbnails, timeline
+from posts.models import Comment, Follow, Group, Post, UserStats
+
+
+User = get_user_model()
+NAME_FIELDS = ("username", "first_name", "last_name")
+
+
+def _saved_post_tags(pk):
+    saved = Post.objects.filter(pk=pk).values_list(
+        "group__slug", "author__username"
+    ).first()
+    return cache_tags.post_tags(*saved) if saved else set()
+
+
+def _post_tags(post):
+    return cache_tags.post_tags(
+        post.group.slug if post.group_id else None,
+        post.author.username if post.author_id else None,
+    ) | {cache_tags.post_tag(post.pk)}
+
+
+def _group_authors_tags(group_ids):
+    usernames = Post.objects.filter(
+        group_id__in=group_ids,
+        author__isnull=False,
+    ).values_list("author__username", flat=True).distinct()
+    return {cache_tags.profile_tag(username) for username in usernames}
+
+
+def _profiles_tags(user_ids):
+    usernames = User.objects.filter(
+        pk__in=user_ids,
+    ).values_list("username", flat=True)
+    return {cache_tags.profile_tag(username) for username in usernames}
+
+
+def _commented_posts_tags(author_ids):
+    post_ids = Comment.objects.filter(
+        author_id__in=author_ids,
+    ).values_list("post_id", flat=True).distinct()
+    return {cache_tags.post_tag(post_id) for post_id in post_ids}
+
+
+def _author_groups_tags(author_ids):
+    slugs = Post.objects.filter(
+        author_id__in=author_ids,
+        group__isnull=False,
+    ).values_list("group__slug", flat=True).distinct()
+    return {cache_tags.group_tag(slug) for slug in slugs}
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.pk:
+        instance._stale_cache_tags = _saved_post_tags(instance.pk)
+    # The field commits an uploaded file after this signal.
+    instance._image_uploaded = bool(
+        instance.image
+    ) and not instance.image._committed
+    if instance._image_uploaded:
+        (
+            instance.image_width,
+            instance.image_height,
+            instance.image_format,
+        ) = thumbnails.image_info(instance.image)
+    elif not instance.image:
+        instance.image_width = instance.image_height = None
+        instance.image_format = ""
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        timeline.fan_out_post(instance)
+        counters.bump_user(instance.author_id, posts_count=1)
+    stale_tags = getattr(instance, "_stale_cache_tags", set())
+    invalidate_tags(*(stale_tags | _post_tags(instance)))
+    if getattr(instance, "_image_uploaded", False):
+        name = instance.image.name
+        transaction.on_commit(lambda: thumbnails.schedule(name))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, posts_count=-1)
+    invalidate_tags(*_post_tags(instance))
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._saved_slug, instance._saved_title = Group.objects.filter(
+            pk=instance.pk,
+        ).values_list("slug", "title").first() or (None, None)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    saved_slug = getattr(instance, "_saved_slug", None)
+    saved_title = getattr(instance, "_saved_title", None)
+    lookups.groups.invalidate(*{instance.slug, saved_slug} - {None})
+    if raw:
+        return
+    if created:
+        # Pages of a deleted group with the same slug may be cached.
+        invalidate_tags(cache_tags.group_tag(instance.slug), cache_tags.GROUPS)
+        return
+    tags = {cache_tags.group_tag(instance.slug), cache_tags.GROUPS}
+    if saved_slug != instance.slug:
+        # Cards link to the group by slug.
+        tags |= {cache_tags.group_tag(saved_slug), cache_tags.INDEX}
+        tags |= _group_authors_tags((instance.pk,))
+    elif saved_title != instance.title:
+        # Feeds show the title as the category of posts.
+        tags |= {cache_tags.INDEX} | _group_authors_tags((instance.pk,))
+    invalidate_tags(*tags)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    lookups.groups.invalidate(instance.slug)
+    invalidate_tags(
+        cache_tags.INDEX,
+        cache_tags.GROUPS,
+        cache_tags.group_tag(instance.slug),
+        *_group_authors_tags((instance.pk,)),
+    )
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(
+        NAME_FIELDS
+    ):
+        # Skips last_login updates and alike.
+        return
+    if instance.pk and not raw:
+        instance._saved_names = User.objects.filter(
+            pk=instance.pk,
+        ).values_list(*NAME_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, update_fields=None,
+               **kwargs):
+    saved_names = getattr(instance, "_saved_names", None)
+    if update_fields is None or set(update_fields) - {"last_login"}:
+        lookups.authors.invalidate(
+            *{instance.username, saved_names and saved_names[0]} - {None}
+        )
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+        invalidate_tags(cache_tags.profile_tag(instance.username))
+    if raw or created or saved_names is None:
+        return
+    names = tuple(getattr(instance, field) for field in NAME_FIELDS)
+    if names == saved_names:
+        return
+    invalidate_tags(
+        cache_tags.INDEX,
+        cache_tags.profile_tag(saved_names[0]),
+        cache_tags.profile_tag(instance.username),
+        *_author_groups_tags((instance.pk,)),
+        *_commented_posts_tags((instance.pk,)),
+    )
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    lookups.authors.invalidate(instance.username)
+    invalidate_tags(
+        cache_tags.INDEX,
+        cache_tags.profile_tag(instance.username),
+        *_author_groups_tags((instance.pk,)),
+        *_commented_posts_tags((instance.pk,)),
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance.user_id, instance.author_id)
+        counters.bump_user(instance.author_id, followers_count=1)
+        counters.bump_user(instance.user_id, following_count=1)
+        invalidate_tags(
+            *_profiles_tags((instance.user_id, instance.author_id))
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    timeline.trim(instance.user_id, instance.author_id)
+    counters.bump_user(instance.author_id, followers_count=-1)
+    counters.bump_user(instance.user_id, following_count=-1)
+    invalidate_tags(*_profiles_tags((instance.user_id, instance.author_id)))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.bump_post(instance.post_id, 1)
+    invalidate_tags(cache_tags.post_tag(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_post(instance.post_id, -1)
+    invalidate_tags(cache_tags.post_tag(instance.post_id))
@@ -0,0 +1,67 @@
+import hashlib
+
+from django import template
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.tiered_cache import TieredCache
+from posts.paginators import encode_cursor
+
+
+register = template.Library()
+CARD_TEMPLATE = "includes/post_card.html"
+CARD_KEY = "card:%s:%s"
+# Cards are never invalidated, the key changes with the displayed
+# fields, the timeout only drops cards of edited posts.
+CARD_TIMEOUT = 60 * 60 * 24
+card_cache = TieredCache("cards")
+
+
+def card_key(post):
+    """Keys a card by the post and a digest of everything it shows."""
+    author = post.author
+    raw = "\x1f".join(map(str, (
+        post.text,
+        post.pub_date.isoformat(),
+        post.image.name if post.image else "",
+        post.image_width,
+        author.username if author else "",
+        author.get_full_name() if author else "",
+        post.group.slug if post.group_id else "",
+    )))
+    return CARD_KEY % (
+        post.pk, hashlib.md5(raw.encode()).hexdigest()
+    )
+
+
+@register.simple_tag
+def post_cards(posts):
+    """
+    Returns the rendered cards of posts, reading all of them from the
+    cache in one round trip and rendering only the missing ones.
+    """
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cards = card_cache.get_many(keys)
+    rendered = {
+        key: render_to_string(CARD_TEMPLATE, {"post": post})
+        for key, post in zip(keys, posts)
+        if key not in cards
+    }
+    if rendered:
+        card_cache.set_many(rendered, CARD_TIMEOUT)
+        cards.update(rendered)
+    return [mark_safe(cards[key]) for key in keys]
+
+
+@register.filter
+def next_cursor(page_obj):
+    """
+    Returns the cursor of the page after, numbered pages included,
+    so infinite scroll can go on from any page.
+    """
+    if getattr(page_obj, "is_cursor", False):
+        return page_obj.next_cursor
+    if page_obj.has_next():
+        return encode_cursor(page_obj[len(page_obj) - 1])
+    return None
@@ -0,0 +1,55 @@
+import hashlib
+
+from django import template
+from sorl.thumbnail import get_thumbnail
+
+from core.tiered_cache import TieredCache
+from posts import thumbnails
+
+
+register = template.Library()
+SRCSET_KEY = "srcset:%s"
+# An upload gets a new stored name, so the key changes with the image.
+SRCSET_TIMEOUT = 60 * 60 * 24
+srcset_cache = TieredCache("srcsets")
+
+
+def thumbnail_urls(post):
+    """
+    Returns (url, size) pairs of the thumbnails of a post image.
+    sorl is asked for them once per image, then they come from
+    the cache without any thumbnail store lookups.
+    """
+    raw = "%s:%s" % (post.image.name, post.image_width)
+    key = SRCSET_KEY % hashlib.md5(raw.encode()).hexdigest()
+    urls = srcset_cache.get(key)
+    if urls is None:
+        urls = [
+            (
+                get_thumbnail(
+                    post.image,
+                    thumbnails.geometry(size),
+                    **thumbnails.OPTIONS,
+                ).url,
+                size,
+            )
+            for size in thumbnails.sizes_for(post.image_width)
+        ]
+        srcset_cache.set(key, urls, SRCSET_TIMEOUT)
+    return urls
+
+
+@register.inclusion_tag("posts/includes/post_image.html")
+def post_image(post, sizes="100vw"):
+    """
+    Renders a post image as a lazy srcset of pre-generated thumbnails,
+    sized by the dimensions stored on upload.
+    """
+    if not post.image:
+        return {}
+    images = thumbnail_urls(post)
+    return {
+        "images": images,
+        "largest": images[-1],
+        "sizes": sizes,
+    }
@@ -0,0 +1,11 @@
+from django import template
+
+from posts import search
+
+
+register = template.Library()
+
+
+@register.filter
+def highlight(snippet):
+    return search.highlight(snippet)
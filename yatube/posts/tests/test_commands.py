@@ -0,0 +1,209 @@
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import F, Sum
+from django.test import TestCase, override_settings
+
+from posts import thumbnails
+from .test_thumbnails import SMALL_GIF
+from ..models import (
+    Comment,
+    Follow,
+    Group,
+    ImportCheckpoint,
+    Post,
+    Timeline,
+    UserStats,
+)
+
+User = get_user_model()
+
+
+class GenerateDatasetTest(TestCase):
+    def test_generate_dataset(self):
+        """Test generated rows come with timelines and counters."""
+        call_command(
+            "generate_dataset",
+            users=30,
+            groups=2,
+            posts=200,
+            comments=100,
+            seed=1,
+            stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertGreater(Follow.objects.count(), 0)
+        self.assertFalse(Follow.objects.filter(user=F("author")).exists())
+        expected = sum(
+            Post.objects.filter(author_id=author_id).count()
+            for author_id in Follow.objects.values_list(
+                "author_id", flat=True
+            )
+        )
+        self.assertEqual(Timeline.objects.count(), expected)
+        self.assertEqual(
+            UserStats.objects.aggregate(total=Sum("posts_count"))["total"],
+            200,
+        )
+        self.assertEqual(
+            Post.objects.aggregate(total=Sum("comment_count"))["total"],
+            100,
+        )
+        self.assertGreater(
+            Post.objects.values("pub_date__date").distinct().count(), 1
+        )
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.images = os.path.join(cls.directory, "images")
+        os.mkdir(cls.images)
+        with open(os.path.join(cls.images, "small.gif"), "wb") as file:
+            file.write(SMALL_GIF)
+        with open(os.path.join(cls.images, "broken.gif"), "wb") as file:
+            file.write(b"not an image")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+
+    def write(self, rows):
+        path = os.path.join(self.directory, "posts.jsonl")
+        with open(path, "w") as file:
+            for row in rows:
+                file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return path
+
+    def call(self, path, **options):
+        stderr = StringIO()
+        pool = ThreadPoolExecutor(1)
+        with override_settings(MEDIA_ROOT=self.directory):
+            with mock.patch.object(thumbnails, "generate"):
+                with mock.patch.object(
+                    thumbnails, "get_pool", return_value=pool
+                ):
+                    try:
+                        call_command(
+                            "import_posts",
+                            path,
+                            images=self.images,
+                            stdout=StringIO(),
+                            stderr=stderr,
+                            **options,
+                        )
+                    finally:
+                        pool.shutdown()
+        return stderr.getvalue()
+
+    def test_import_posts(self):
+        """Test valid rows are imported and invalid ones rejected."""
+        path = self.write([
+            {
+                "author": "author",
+                "group": "test-slug",
+                "text": "Пост с картинкой",
+                "image": "small.gif",
+                "pub_date": "2020-01-02T03:04:05+00:00",
+            },
+            {"author_id": self.author.pk, "text": "Пост без группы"},
+            {"author": "author", "text": "   "},
+            {"author": "nobody", "text": "Неизвестный автор"},
+            {"author": "author", "text": "Битая", "image": "broken.gif"},
+            {"author": "author", "text": "Чужая", "image": "../posts.jsonl"},
+        ])
+        stderr = self.call(path, batch_size=2)
+        self.assertEqual(stderr.count("Rejected"), 4)
+        self.assertEqual(Post.objects.count(), 2)
+        post = Post.objects.get(text="Пост с картинкой")
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(
+            (post.image_width, post.image_height, post.image_format),
+            (2, 1, "GIF"),
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory, post.image.name))
+        )
+        self.assertEqual(
+            Timeline.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 2
+        )
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_rejected_rows_copy_no_images(self):
+        """Test images of rows with an unknown author are not copied."""
+        path = self.write([
+            {"author": "nobody", "text": "Чужой", "image": "small.gif"},
+            {"author": "author", "group": "none", "image": "small.gif",
+             "text": "Без группы"},
+        ])
+        media = os.path.join(self.directory, "posts")
+        os.makedirs(media, exist_ok=True)
+        copied = set(os.listdir(media))
+        with self.assertRaises(CommandError):
+            self.call(path)
+        self.assertEqual(set(os.listdir(media)), copied)
+
+    def test_checkpoint_saved_with_batch(self):
+        """Test a failed batch rolls back along with its checkpoint."""
+        path = self.write([
+            {"author": "author", "text": "Первый пакет"},
+            {"author": "author", "text": "Второй пакет"},
+        ])
+        fan_out = mock.patch(
+            "posts.timeline.fan_out_posts_since",
+            side_effect=[None, RuntimeError],
+        )
+        with fan_out, self.assertRaises(RuntimeError):
+            self.call(path, batch_size=1)
+        checkpoint = ImportCheckpoint.objects.get()
+        self.assertEqual(checkpoint.imported, Post.objects.count())
+        self.call(path, batch_size=1)
+        self.assertEqual(
+            list(Post.objects.order_by("pk").values_list("text", flat=True)),
+            ["Первый пакет", "Второй пакет"],
+        )
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test an import skips rows a checkpoint marks as imported."""
+        path = self.write([
+            {"author": "author", "text": "Уже загружен"},
+            {"author": "author", "text": "Новый пост"},
+        ])
+        with open(path, "rb") as file:
+            offset = len(file.readline())
+        ImportCheckpoint.objects.create(
+            source=os.path.realpath(path), offset=offset, imported=1,
+        )
+        self.call(path)
+        self.assertEqual(
+            list(Post.objects.values_list("text", flat=True)),
+            ["Новый пост"],
+        )
+        self.assertFalse(ImportCheckpoint.objects.exists())
@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.follower = User.objects.create_user(username="follower")
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_counters_follow_writes(self):
+        """Test counters change on create and delete."""
+        post = Post.objects.create(author=CountersTest.author, text="Пост")
+        self.assertEqual(self.stats(CountersTest.author).posts_count, 1)
+
+        comment = Comment.objects.create(
+            author=CountersTest.follower, post=post, text="Комментарий",
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+        follow = Follow.objects.create(
+            user=CountersTest.follower, author=CountersTest.author,
+        )
+        self.assertEqual(self.stats(CountersTest.author).followers_count, 1)
+        self.assertEqual(self.stats(CountersTest.follower).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.stats(CountersTest.author).followers_count, 0)
+        self.assertEqual(self.stats(CountersTest.follower).following_count, 0)
+
+        post.delete()
+        self.assertEqual(self.stats(CountersTest.author).posts_count, 0)
+
+    def test_reconcile_counters(self):
+        """Test reconcile_counters repairs drifted and missing rows."""
+        post = Post.objects.create(author=CountersTest.author, text="Пост")
+        Comment.objects.create(
+            author=CountersTest.follower, post=post, text="Комментарий",
+        )
+        Follow.objects.create(
+            user=CountersTest.follower, author=CountersTest.author,
+        )
+        UserStats.objects.filter(user=CountersTest.author).update(
+            posts_count=10,
+        )
+        UserStats.objects.filter(user=CountersTest.follower).delete()
+        Post.objects.filter(pk=post.pk).update(comment_count=5)
+
+        call_command("reconcile_counters", batch_size=1, stdout=StringIO())
+
+        author_stats = self.stats(CountersTest.author)
+        self.assertEqual(author_stats.posts_count, 1)
+        self.assertEqual(author_stats.followers_count, 1)
+        self.assertEqual(self.stats(CountersTest.follower).following_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
@@ -0,0 +1,97 @@
+import gzip
+import json
+from functools import partial
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.queries import QueryLog
+
+from .. import export
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username="staff", is_staff=True)
+        cls.user = User.objects.create_user(username="user")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, text=f"Тестовый пост {num}", group=cls.group,
+            )
+            for num in range(5)
+        ]
+        Comment.objects.create(
+            author=cls.staff, post=cls.posts[0], text="Комментарий",
+        )
+        Follow.objects.create(user=cls.staff, author=cls.user)
+
+    def setUp(self) -> None:
+        self.staff_client = Client()
+        self.staff_client.force_login(ExportTest.staff)
+
+    def read(self, response):
+        content = b"".join(response.streaming_content)
+        if response["Content-Type"] == "application/gzip":
+            content = gzip.decompress(content)
+        return [json.loads(line) for line in content.decode().splitlines()]
+
+    def test_rows_read_in_chunks(self):
+        """Test chunked reads return every row once, in pk order."""
+        self.assertEqual(
+            [row["id"] for row in export.rows("posts", chunk_size=2)],
+            [post.pk for post in ExportTest.posts],
+        )
+
+    def test_export_streams_jsonl(self):
+        """Test staff can stream every export, plain and gzipped."""
+        for name, model in (
+            ("posts", Post),
+            ("comments", Comment),
+            ("follows", Follow),
+            ("groups", Group),
+        ):
+            for params in ({}, {"gzip": 1}):
+                with self.subTest(name=name, params=params):
+                    response = self.staff_client.get(
+                        reverse("posts:export", args=(name,)), params
+                    )
+                    self.assertTrue(response.streaming)
+                    self.assertEqual(
+                        len(self.read(response)), model.objects.count()
+                    )
+
+    def test_export_queries_per_chunk(self):
+        """Test a streamed export reads one query per chunk of rows."""
+        url = reverse("posts:export", args=("posts",))
+        # 5 posts in chunks of 2: two full chunks and a short one.
+        chunked = partial(export.jsonl, chunk_size=2)
+        with mock.patch.object(export, "jsonl", chunked):
+            with QueryLog() as log:
+                response = self.staff_client.get(url)
+                self.read(response)
+        # The session and the user, then the chunks.
+        self.assertEqual(len(log), 2 + 3)
+
+    def test_export_staff_only(self):
+        """Test the export is hidden from other users and bad names."""
+        user_client = Client()
+        user_client.force_login(ExportTest.user)
+        response = user_client.get(reverse("posts:export", args=("posts",)))
+        self.assertFalse(getattr(response, "streaming", False))
+        self.assertEqual(response.status_code, 302)
+        response = self.staff_client.get(
+            reverse("posts:export", args=("users",))
+        )
+        self.assertEqual(response.status_code, 404)
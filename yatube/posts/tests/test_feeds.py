@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+
+User = get_user_model()
+
+
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.other = User.objects.create_user(username="other")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text="Пост в группе",
+            group=cls.group,
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.other,
+            text="Пост без группы",
+        )
+
+    def setUp(self) -> None:
+        self.guest_client = Client()
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_feeds_show_their_posts(self):
+        """Test every feed lists the posts of its scope only."""
+        feeds = {
+            reverse("posts:index_feed"): (
+                FeedsTest.post, FeedsTest.other_post,
+            ),
+            reverse("posts:group_feed", args=("test_slug",)): (
+                FeedsTest.post,
+            ),
+            reverse("posts:profile_feed", args=("other",)): (
+                FeedsTest.other_post,
+            ),
+        }
+        for url, posts in feeds.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(
+                    response["Content-Type"],
+                    "application/rss+xml; charset=utf-8",
+                )
+                for post in Post.objects.all():
+                    link = reverse("posts:post_detail", args=(post.pk,))
+                    if post in posts:
+                        self.assertContains(response, link)
+                    else:
+                        self.assertNotContains(response, link)
+
+    def test_post_of_deleted_author(self):
+        """Test feeds list posts whose author was deleted."""
+        user = User.objects.create_user(username="gone")
+        Post.objects.create(
+            author=user, text="Пост удалённого", group=FeedsTest.group
+        )
+        user.delete()
+        for url in (
+            reverse("posts:index_feed"),
+            reverse("posts:group_feed", args=("test_slug",)),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.guest_client.get(url), "Пост удалённого"
+                )
+
+    def test_atom_format(self):
+        """Test '?format=atom' switches a feed to Atom."""
+        response = self.guest_client.get(
+            reverse("posts:group_feed", args=("test_slug",)),
+            {"format": "atom"},
+        )
+        self.assertEqual(
+            response["Content-Type"], "application/atom+xml; charset=utf-8"
+        )
+        self.assertContains(response, "<subtitle>Тестовое описание")
+
+    def test_unknown_scope_not_found(self):
+        """Test feeds of missing groups and authors answer 404."""
+        for url in (
+            reverse("posts:group_feed", args=("missing",)),
+            reverse("posts:profile_feed", args=("missing",)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
+
+    def test_feed_not_modified_until_new_post(self):
+        """Test pollers get 304 until a post of the feed arrives."""
+        url = reverse("posts:profile_feed", args=("author",))
+        etag = self.guest_client.get(url)["ETag"]
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=FeedsTest.other, text="Чужой пост")
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=FeedsTest.author, text="Новый пост")
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "Новый пост")
+
+    def test_renamed_group_in_every_feed(self):
+        """Test a new group title reaches the index and author feeds."""
+        urls = (
+            reverse("posts:index_feed"),
+            reverse("posts:profile_feed", args=("author",)),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+        group = Group.objects.get(pk=FeedsTest.group.pk)
+        group.title = "Новое название"
+        group.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, "Новое название")
+                self.assertNotContains(response, "Тестовая группа")
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import assert_query_budget
+
+from ..models import Comment, Follow, Group, Post
+from ..urls import urlpatterns
+
+User = get_user_model()
+PAGE_SIZE = 12
+
+
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="user")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        # Different authors and commenters, so per-row lookups show up.
+        for num in range(PAGE_SIZE):
+            author = User.objects.create_user(username=f"author_{num}")
+            Follow.objects.create(user=cls.user, author=author)
+            cls.post = Post.objects.create(
+                author=author,
+                text=f"Тестовый пост {num}",
+                group=cls.group,
+            )
+            Comment.objects.create(
+                author=author, post=cls.post, text="Комментарий",
+            )
+        cls.kwargs = {
+            "slug": cls.group.slug,
+            "username": cls.post.author.username,
+            "post_id": cls.post.pk,
+            "name": "posts",
+        }
+
+    def setUp(self) -> None:
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.post.author)
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_views_within_budget(self):
+        """Test every view of posts.urls keeps to its query budget."""
+        for pattern in urlpatterns:
+            if not hasattr(pattern.callback, "query_budget"):
+                # The export runs a query per chunk, see ExportTest.
+                continue
+            url = reverse(
+                f"posts:{pattern.name}",
+                kwargs={
+                    name: self.kwargs[name]
+                    for name in pattern.pattern.converters
+                },
+            )
+            with self.subTest(url=url):
+                assert_query_budget(url, self.authorized_client)
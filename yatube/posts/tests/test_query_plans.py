@@ -0,0 +1,84 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..paginators import encode_cursor
+
+User = get_user_model()
+# "SCAN posts_post" reads the whole table, while
+# "SCAN posts_post USING INDEX ..." walks an index in order.
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?(?P<table>\w+)$")
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.follower = User.objects.create_user(username="follower")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        for num in range(3):
+            cls.post = Post.objects.create(
+                author=cls.author,
+                text=f"Тестовая пост {num}",
+                group=cls.group,
+            )
+            Comment.objects.create(
+                author=cls.follower, post=cls.post, text="Комментарий",
+            )
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def setUp(self) -> None:
+        self.authorized_client = Client()
+        self.authorized_client.force_login(QueryPlanTest.follower)
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def full_scans(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            plan = [row[-1] for row in cursor.fetchall()]
+        return [
+            detail for detail in plan
+            if FULL_SCAN.match(detail)
+        ]
+
+    def test_views_do_not_scan_tables(self):
+        """Test every query of the list and detail views uses an index."""
+        cursor = {"after": encode_cursor(QueryPlanTest.post)}
+        urls_list = [
+            (reverse("posts:index"), {}),
+            (reverse("posts:index"), cursor),
+            (reverse("posts:group_list", args=(QueryPlanTest.group.slug,)),
+             {}),
+            (reverse("posts:group_list", args=(QueryPlanTest.group.slug,)),
+             cursor),
+            (reverse("posts:profile", args=(QueryPlanTest.author,)), {}),
+            (reverse("posts:profile", args=(QueryPlanTest.author,)), cursor),
+            (reverse("posts:post_detail", args=(QueryPlanTest.post.pk,)),
+             {}),
+            (reverse("posts:follow_index"), {}),
+            (reverse("posts:follow_index"), cursor),
+        ]
+        for url, params in urls_list:
+            with self.subTest(url=url, params=params):
+                with CaptureQueriesContext(connection) as queries:
+                    self.authorized_client.get(url, params)
+                for query in queries.captured_queries:
+                    if not query["sql"].startswith("SELECT"):
+                        continue
+                    self.assertEqual(
+                        self.full_scans(query["sql"]), [], query["sql"]
+                    )
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..search import search_posts
+
+User = get_user_model()
+# Created by migration 0015, SQLite drops them whenever a later
+# migration rebuilds posts_post.
+FTS_TRIGGERS = {
+    "posts_post_fts_insert",
+    "posts_post_fts_delete",
+    "posts_post_fts_update",
+}
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username="author", is_staff=True, is_superuser=True,
+        )
+        cls.once = Post.objects.create(
+            author=cls.author,
+            text="Кот гуляет <b>сам</b> по себе, а собака спит",
+        )
+        cls.twice = Post.objects.create(
+            author=cls.author,
+            text="Кот и ещё раз кот",
+        )
+        cls.other = Post.objects.create(
+            author=cls.author,
+            text="Про собак",
+        )
+
+    def setUp(self) -> None:
+        self.client = Client()
+
+    def test_search_ranks_and_highlights(self):
+        """Test search returns ranked posts with escaped highlights."""
+        response = self.client.get(reverse("posts:search"), {"q": "кот"})
+        self.assertEqual(
+            list(response.context["page_obj"]),
+            [SearchTest.twice, SearchTest.once],
+        )
+        self.assertContains(response, "<mark>Кот</mark>")
+        self.assertContains(response, "&lt;b&gt;сам&lt;/b&gt;")
+        self.assertNotContains(response, "<b>сам</b>")
+
+    def test_triggers_survive_migrations(self):
+        """Test the triggers syncing the index exist after migrating."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'trigger' AND tbl_name = 'posts_post'"
+            )
+            triggers = {name for (name,) in cursor.fetchall()}
+        self.assertEqual(FTS_TRIGGERS - triggers, set())
+
+    def test_index_follows_changes(self):
+        """Test the index follows updated and deleted posts."""
+        post = Post.objects.create(author=SearchTest.author, text="Ёжик")
+        self.assertEqual(list(search_posts("ёжик")), [post])
+        post.text = "Заяц"
+        post.save()
+        self.assertEqual(list(search_posts("ёжик")), [])
+        self.assertEqual(list(search_posts("заяц")), [post])
+        post.delete()
+        self.assertEqual(list(search_posts("заяц")), [])
+
+    def test_query_syntax_is_ignored(self):
+        """Test FTS5 operators and quotes in a query do not break it."""
+        for query in ('кот"', "кот OR", "NEAR(", "*", ""):
+            with self.subTest(query=query):
+                response = self.client.get(
+                    reverse("posts:search"), {"q": query}
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_admin_search(self):
+        """Test the admin changelist searches the full-text index."""
+        self.client.force_login(SearchTest.author)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "собака"}
+        )
+        self.assertEqual(
+            list(response.context["cl"].result_list), [SearchTest.once]
+        )
+
+    def test_admin_search_without_words(self):
+        """Test the admin finds nothing for a term without words."""
+        self.client.force_login(SearchTest.author)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "!!!"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["cl"].result_list), [])
@@ -0,0 +1,142 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Post
+
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.author = User.objects.create_user(username="author")
+
+    def test_upload_schedules_thumbnails(self):
+        """Test only a newly uploaded image is queued for thumbnails."""
+        with mock.patch.object(thumbnails, "schedule") as schedule:
+            post = Post.objects.create(
+                author=self.author,
+                text="Тестовый пост",
+                image=SimpleUploadedFile(
+                    name="small.gif",
+                    content=SMALL_GIF,
+                    content_type="image/gif",
+                ),
+            )
+            post.text = "Новый текст"
+            post.save()
+        schedule.assert_called_once_with(post.image.name)
+
+    def test_workers_share_caller_settings(self):
+        """Test workers never use a database the caller does not."""
+        with mock.patch.object(thumbnails, "get_pool") as get_pool:
+            self.assertIsNone(thumbnails.schedule("posts/small.gif"))
+        get_pool.assert_not_called()
+        shared = thumbnails.worker_settings()
+        self.assertEqual(shared["MEDIA_ROOT"], TEMP_MEDIA_ROOT)
+        settings_dict = {"NAME": "db.sqlite3"}
+        with mock.patch.object(thumbnails.django, "setup"):
+            with mock.patch.object(thumbnails, "settings") as worker:
+                with mock.patch(
+                    "django.db.connection.settings_dict", settings_dict
+                ):
+                    thumbnails.setup_worker(shared)
+        self.assertEqual(settings_dict["NAME"], shared["DATABASE_NAME"])
+        self.assertEqual(worker.MEDIA_ROOT, TEMP_MEDIA_ROOT)
+
+    def test_generate_stores_thumbnails(self):
+        """Test generate renders the thumbnails the templates ask for."""
+        from sorl.thumbnail import default, get_thumbnail
+
+        post = Post.objects.create(
+            author=self.author,
+            text="Тестовый пост",
+            image=SimpleUploadedFile(
+                name="small.gif",
+                content=SMALL_GIF,
+                content_type="image/gif",
+            ),
+        )
+        thumbnails.generate(post.image.name)
+        for size in thumbnails.SIZES:
+            with self.subTest(size=size):
+                with mock.patch.object(default.engine, "get_image") as render:
+                    thumbnail = get_thumbnail(
+                        post.image,
+                        thumbnails.geometry(size),
+                        **thumbnails.OPTIONS,
+                    )
+                render.assert_not_called()
+                self.assertTrue(thumbnail.exists())
+
+    def test_srcset_cached_per_image(self):
+        """Test thumbnails are looked up once per image, then cached."""
+        from django.core.cache import cache
+
+        from posts.templatetags import post_images
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        post = Post.objects.create(
+            author=self.author,
+            text="Тестовый пост",
+            image=SimpleUploadedFile(
+                name="small.gif",
+                content=SMALL_GIF,
+                content_type="image/gif",
+            ),
+        )
+        first = post_images.post_image(post)
+        with mock.patch.object(post_images, "get_thumbnail") as lookup:
+            self.assertEqual(post_images.post_image(post), first)
+        lookup.assert_not_called()
+
+    def test_upload_stores_image_info(self):
+        """Test upload stores image dimensions used by the srcset."""
+        post = Post.objects.create(
+            author=self.author,
+            text="Тестовый пост",
+            image=SimpleUploadedFile(
+                name="small.gif",
+                content=SMALL_GIF,
+                content_type="image/gif",
+            ),
+        )
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.image_width, post.image_height, post.image_format),
+            (2, 1, "GIF"),
+        )
+        self.assertEqual(
+            thumbnails.sizes_for(post.image_width), thumbnails.SIZES[:1]
+        )
+        self.assertEqual(thumbnails.sizes_for(1200), thumbnails.SIZES)
+        response = self.client.get(
+            reverse("posts:post_detail", args=(post.pk,))
+        )
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'width="480"')
+        self.assertContains(response, 'height="170"')
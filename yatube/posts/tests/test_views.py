@@ -1,6 +1,8 @@
 import shutil
 import tempfile
 
+from unittest import mock
+
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
@@ -8,9 +10,12 @@ from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.conf import settings
 
+from .. import lookups
 from ..forms import PostForm
-from ..models import Follow, Group, Post
-from ..views import POSTS_ON_PAGE
+from ..templatetags import post_cards
+from ..paginators import encode_cursor
+from ..models import Comment, Follow, Group, Post, Timeline
+from ..views import COMMENTS_ON_PAGE, POSTS_ON_PAGE
 
 
 User = get_user_model()
@@ -133,6 +138,7 @@ class PostsViewTest(TestCase):
         ]
         for url in url_list:
             with self.subTest(url=url):
+                cache.clear()
                 response = self.guest_client.get(url)
                 post_list = response.context.get("page_obj")
                 single_post = post_list[0]
@@ -166,6 +172,13 @@ class PageViewTest(TestCase):
     def tearDown(self) -> None:
         cache.clear()
 
+    def test_cached_author_has_no_password(self):
+        """Test authors are cached without the password hash."""
+        self.guest_client.get(reverse("posts:profile", args=("auth",)))
+        author = lookups.authors.get("auth")
+        self.assertEqual(author.pk, PageViewTest.user.pk)
+        self.assertIn("password", author.get_deferred_fields())
+
     def test_correct_index(self):
         """Test context in template index is correct."""
         response = self.guest_client.get(
@@ -231,6 +244,38 @@ class PageViewTest(TestCase):
                 self.assertEqual(
                     len(response.context["page_obj"]), TEST_POSTS_ON_PAGE_2)
 
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_cursor_paginator(self):
+        """Test keyset pages walk forward and back without overlap."""
+        urls_list = [
+            reverse("posts:group_list", kwargs={
+                    "slug": PageViewTest.group.slug}),
+            reverse("posts:index"),
+            reverse(
+                "posts:profile",
+                kwargs={"username": PageViewTest.user.get_username()},
+            ),
+        ]
+        for url in urls_list:
+            with self.subTest(url=url):
+                first_page = self.guest_client.get(url).context["page_obj"]
+                self.assertEqual(len(first_page), POSTS_ON_PAGE)
+                self.assertFalse(first_page.has_previous())
+                second_page = self.guest_client.get(
+                    url, {"after": first_page.next_cursor}
+                ).context["page_obj"]
+                self.assertEqual(len(second_page), TEST_POSTS_ON_PAGE_2)
+                self.assertFalse(second_page.has_next())
+                self.assertFalse(
+                    set(first_page.object_list) & set(second_page)
+                )
+                back_page = self.guest_client.get(
+                    url, {"before": second_page.previous_cursor}
+                ).context["page_obj"]
+                self.assertEqual(
+                    list(back_page), list(first_page.object_list)
+                )
+
 
 class GroupViewTest(TestCase):
     @classmethod
@@ -288,6 +333,7 @@ class GroupViewTest(TestCase):
             text="Тестовая пост. Пост. Пост.",
             group=GroupViewTest.group,
         )
+        cache.clear()
         response = self.guest_client.get(
             reverse("posts:group_list", kwargs={
                     "slug": GroupViewTest.group_2.slug})
@@ -386,3 +432,486 @@ class FollowViewTest(TestCase):
             author=follower
         )
         self.assertFalse(self_follow.exists())
+
+    def test_timeline_filled_and_trimmed(self):
+        """Test timeline follows posts, follow and unfollow."""
+        author = FollowViewTest.author
+        follower = FollowViewTest.follower
+        timeline = Timeline.objects.filter(user=follower, author=author)
+        self.assertTrue(timeline.filter(post=FollowViewTest.post).exists())
+
+        new_post = Post.objects.create(
+            author=author,
+            text="Новый пост для ленты",
+        )
+        self.assertTrue(timeline.filter(post=new_post).exists())
+
+        Follow.objects.filter(user=follower, author=author).delete()
+        self.assertFalse(timeline.exists())
+
+        Follow.objects.create(user=follower, author=author)
+        self.assertEqual(timeline.count(), author.posts.count())
+
+    def test_follow_index_queries_do_not_grow(self):
+        """Test posts:follow_index costs the same for any follow count."""
+        for num in range(TEST_POSTS_ON_PAGE):
+            author = User.objects.create_user(username=f"author_{num}")
+            Post.objects.create(author=author, text=f"Пост {num}")
+            Follow.objects.create(user=FollowViewTest.follower, author=author)
+        # session, user, page count and page of posts
+        with self.assertNumQueries(4):
+            response = self.authorized_client.get(
+                reverse("posts:follow_index")
+            )
+        last_post = response.context["page_obj"][POSTS_ON_PAGE - 1]
+        response = self.authorized_client.get(
+            reverse("posts:follow_index"),
+            {"after": encode_cursor(last_post)},
+        )
+        self.assertEqual(
+            len(response.context["page_obj"]),
+            Timeline.objects.filter(user=FollowViewTest.follower).count()
+            - POSTS_ON_PAGE,
+        )
+
+    def test_follow_index_numbered_pages_with_equal_dates(self):
+        """Test posts published at once are split across pages exactly."""
+        for num in range(TEST_POSTS_ON_PAGE):
+            Post.objects.create(author=FollowViewTest.author, text=f"П{num}")
+        date = FollowViewTest.post.pub_date
+        Post.objects.update(pub_date=date)
+        Timeline.objects.update(pub_date=date)
+        url = reverse("posts:follow_index")
+        posts = []
+        for page in (1, 2):
+            response = self.authorized_client.get(url, {"page": page})
+            posts += list(response.context["page_obj"])
+        self.assertEqual(
+            posts, list(FollowViewTest.author.posts.order_by("-pk"))
+        )
+
+    def test_follow_index_pages_with_shared_authors(self):
+        """Test posts of an author with several followers show once."""
+        for num in range(TEST_POSTS_ON_PAGE):
+            Post.objects.create(author=FollowViewTest.author, text=f"П{num}")
+        for num in range(2):
+            Follow.objects.create(
+                user=User.objects.create_user(username=f"follower_{num}"),
+                author=FollowViewTest.author,
+            )
+        url = reverse("posts:follow_index")
+        response = self.authorized_client.get(url)
+        posts = list(response.context["page_obj"])
+        response = self.authorized_client.get(
+            url, {"after": encode_cursor(posts[-1])}
+        )
+        posts += list(response.context["page_obj"])
+        self.assertEqual(
+            posts,
+            list(FollowViewTest.author.posts.order_by("-pub_date", "-pk")),
+        )
+
+
+class IndexCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text="Тестовая пост. Пост. Пост.",
+            group=cls.group,
+        )
+
+    def setUp(self) -> None:
+        self.guest_client = Client()
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def index_rendered(self):
+        """Tells if the view ran, rather than only the header holes."""
+        response = self.guest_client.get(reverse("posts:index"))
+        return "page_obj" in (response.context or {})
+
+    def test_index_is_cached(self):
+        """Test posts:index is served from cache until a change."""
+        self.guest_client.get(reverse("posts:index"))
+        self.assertFalse(self.index_rendered())
+
+    def assert_index_invalidated(self):
+        self.assertTrue(self.index_rendered())
+
+    def test_index_cache_invalidated_by_post(self):
+        """Test a new post purges posts:index."""
+        self.guest_client.get(reverse("posts:index"))
+        Post.objects.create(author=IndexCacheTest.user, text="Новый пост")
+        self.assert_index_invalidated()
+
+    def test_index_cache_invalidated_by_group(self):
+        """Test a group slug change purges posts:index."""
+        self.guest_client.get(reverse("posts:index"))
+        group = Group.objects.get(pk=IndexCacheTest.group.pk)
+        group.slug = "new_slug"
+        group.save()
+        self.assert_index_invalidated()
+
+    def test_index_cache_invalidated_by_author_name(self):
+        """Test an author name change purges posts:index."""
+        self.guest_client.get(reverse("posts:index"))
+        user = User.objects.get(pk=IndexCacheTest.user.pk)
+        user.save(update_fields=("last_login",))
+        self.assertFalse(self.index_rendered())
+        user.first_name = "Лев"
+        user.save()
+        self.assert_index_invalidated()
+
+
+class CardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f"Пост {num}", group=cls.group)
+            for num in range(TEST_POSTS_ON_PAGE_2)
+        )
+
+    def setUp(self) -> None:
+        self.guest_client = Client()
+        self.url = reverse("posts:group_list", args=("test_slug",))
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_group_list_shows_each_post_once(self):
+        """Test posts:group_list renders a card per post."""
+        response = self.guest_client.get(self.url)
+        for post in Post.objects.all():
+            with self.subTest(post=post.pk):
+                self.assertContains(response, f"<p>{post.text}</p>", count=1)
+
+    def test_cards_are_cached(self):
+        """Test cards are rendered again only when they change."""
+        self.guest_client.get(self.url)
+        with mock.patch.object(
+            post_cards, "render_to_string", wraps=post_cards.render_to_string
+        ) as render:
+            self.guest_client.get(self.url)
+            render.assert_not_called()
+            post = Post.objects.first()
+            post.text = "Новый текст"
+            post.save()
+            user = User.objects.get(pk=CardCacheTest.user.pk)
+            user.first_name = "Лев"
+            user.save()
+            response = self.guest_client.get(self.url)
+        self.assertEqual(render.call_count, TEST_POSTS_ON_PAGE_2)
+        self.assertContains(response, "Новый текст")
+        self.assertContains(response, "Лев", count=TEST_POSTS_ON_PAGE_2)
+
+    def test_card_of_deleted_author(self):
+        """Test posts whose author was deleted still get a card."""
+        user = User.objects.create_user(username="gone")
+        Post.objects.create(
+            author=user, text="Пост удалённого", group=CardCacheTest.group
+        )
+        user.delete()
+        for url in (
+            reverse("posts:index"),
+            self.url,
+            reverse("posts:group_fragment", args=("test_slug",)),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.guest_client.get(url), "Пост удалённого"
+                )
+
+
+class PageCacheHolesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text="Тестовая пост. Пост. Пост.",
+        )
+
+    def setUp(self) -> None:
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(PageCacheHolesTest.reader)
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_users_share_cached_page(self):
+        """Test a page cached for a guest is served to a user."""
+        url = reverse("posts:profile", args=("author",))
+        self.guest_client.get(url)
+        Follow.objects.create(
+            user=PageCacheHolesTest.reader, author=PageCacheHolesTest.author
+        )
+        self.guest_client.get(url)
+        response = self.reader_client.get(url)
+        self.assertNotIn("page_obj", response.context)
+        self.assertContains(response, "Пользователь: reader")
+        self.assertContains(response, "Отписаться")
+        self.assertContains(response, "Подписчиков: 1")
+        self.assertNotContains(response, "<!--hole:")
+        response = self.guest_client.get(url)
+        self.assertNotContains(response, "Пользователь: reader")
+        self.assertContains(response, "Подписаться")
+
+    def test_post_detail_comment_form(self):
+        """Test the comment form is rendered per user with a token."""
+        url = reverse("posts:post_detail", args=(PageCacheHolesTest.post.pk,))
+        response = self.guest_client.get(url)
+        self.assertNotContains(response, "csrfmiddlewaretoken")
+        response = self.reader_client.get(url)
+        self.assertNotIn("post", response.context)
+        self.assertContains(response, "csrfmiddlewaretoken")
+        self.reader_client.post(
+            reverse(
+                "posts:add_comment", args=(PageCacheHolesTest.post.pk,)
+            ),
+            {"text": "Новый комментарий"},
+        )
+        self.assertContains(
+            self.guest_client.get(url), "Новый комментарий"
+        )
+
+    def test_about_pages_are_cached(self):
+        """Test about pages are cached with the header left per user."""
+        url = reverse("about:author")
+        self.guest_client.get(url)
+        response = self.reader_client.get(url)
+        self.assertNotIn("view", response.context)
+        self.assertContains(response, "Пользователь: reader")
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text="Тестовая пост. Пост. Пост.",
+            group=cls.group,
+        )
+
+    def setUp(self) -> None:
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(ConditionalGetTest.author)
+        self.urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", args=("test_slug",)),
+            reverse("posts:profile", args=("author",)),
+            reverse("posts:post_detail", args=(ConditionalGetTest.post.pk,)),
+        )
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_unchanged_page_not_modified(self):
+        """Test a page is answered with 304 until it changes."""
+        etags = {
+            url: self.guest_client.get(url)["ETag"] for url in self.urls
+        }
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertIsNone(response.context)
+        Comment.objects.create(
+            post=ConditionalGetTest.post,
+            author=ConditionalGetTest.author,
+            text="Новый комментарий",
+        )
+        Post.objects.create(
+            author=ConditionalGetTest.author,
+            text="Новый пост",
+            group=ConditionalGetTest.group,
+        )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Test users do not get each other's holes as not modified."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)["ETag"]
+                response = self.author_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("no-cache", response["Cache-Control"])
+
+
+class FragmentViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.follower = User.objects.create_user(username="follower")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        Post.objects.bulk_create(
+            Post(
+                author=cls.author,
+                text=f"Тестовый пост {num}",
+                group=cls.group,
+            )
+            for num in range(TEST_POSTS_ON_PAGE)
+        )
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def setUp(self) -> None:
+        self.guest_client = Client()
+        self.follower_client = Client()
+        self.follower_client.force_login(FragmentViewTest.follower)
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_fragments_continue_pages(self):
+        """Test a fragment holds the cards after the page, chrome-free."""
+        pages = {
+            reverse("posts:index"): reverse("posts:index_fragment"),
+            reverse("posts:group_list", args=("test_slug",)): reverse(
+                "posts:group_fragment", args=("test_slug",)
+            ),
+            reverse("posts:profile", args=("author",)): reverse(
+                "posts:profile_fragment", args=("author",)
+            ),
+            reverse("posts:follow_index"): reverse("posts:follow_fragment"),
+        }
+        last_on_page = Post.objects.order_by("-pub_date", "-pk")[
+            POSTS_ON_PAGE - 1
+        ]
+        after = encode_cursor(last_on_page)
+        for page, url in pages.items():
+            with self.subTest(url=url):
+                response = self.follower_client.get(page)
+                self.assertContains(response, f'data-url="{url}"')
+                self.assertContains(response, f'data-after="{after}"')
+                response = self.follower_client.get(url, {"after": after})
+                self.assertNotContains(response, "<html")
+                self.assertContains(
+                    response, "подробная информация",
+                    count=TEST_POSTS_ON_PAGE_2,
+                )
+                self.assertNotIn("X-Next-Cursor", response)
+                response = self.follower_client.get(url)
+                self.assertEqual(
+                    response["X-Next-Cursor"], after
+                )
+
+    def test_follow_fragment_with_shared_authors(self):
+        """Test the follow fragment shows each post once, many followers."""
+        for num in range(2):
+            Follow.objects.create(
+                user=User.objects.create_user(username=f"follower_{num}"),
+                author=FragmentViewTest.author,
+            )
+        url = reverse("posts:follow_fragment")
+        after = self.follower_client.get(url)["X-Next-Cursor"]
+        response = self.follower_client.get(url, {"after": after})
+        self.assertContains(
+            response, "подробная информация", count=TEST_POSTS_ON_PAGE_2
+        )
+
+    def test_follow_fragment_needs_login(self):
+        """Test anonymous users are sent to log in for the follow feed."""
+        url = reverse("posts:follow_fragment")
+        response = self.guest_client.get(url)
+        self.assertRedirects(response, f"/auth/login/?next={url}")
+
+
+class CommentPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text="Тестовый пост",
+        )
+        for num in range(COMMENTS_ON_PAGE + TEST_POSTS_ON_PAGE_2):
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f"Комментарий {num}",
+            )
+
+    def setUp(self) -> None:
+        self.guest_client = Client()
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_first_page_inline_rest_as_fragment(self):
+        """Test post_detail shows the oldest comments, a fragment the rest."""
+        response = self.guest_client.get(
+            reverse("posts:post_detail", args=(CommentPagesTest.post.pk,))
+        )
+        comments = list(response.context["comments"])
+        self.assertEqual(len(comments), COMMENTS_ON_PAGE)
+        self.assertEqual(comments[0].text, "Комментарий 0")
+        self.assertContains(
+            response,
+            f"Комментариев: {COMMENTS_ON_PAGE + TEST_POSTS_ON_PAGE_2}",
+        )
+        after = response.context["comments"].next_cursor
+        self.assertContains(response, f'data-after="{after}"')
+        response = self.guest_client.get(
+            reverse(
+                "posts:comments_fragment", args=(CommentPagesTest.post.pk,)
+            ),
+            {"after": after},
+        )
+        self.assertNotContains(response, "<html")
+        self.assertNotContains(response, "Комментарий 0<")
+        self.assertContains(
+            response, "Комментарий", count=TEST_POSTS_ON_PAGE_2
+        )
+        self.assertNotIn("X-Next-Cursor", response)
+
+    def test_missing_post_fragment_not_found(self):
+        """Test comments of a missing post answer 404."""
+        response = self.guest_client.get(
+            reverse("posts:comments_fragment", args=(0,))
+        )
+        self.assertEqual(response.status_code, 404)
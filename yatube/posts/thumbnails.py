@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+
+# Widths of the srcset of post images, all cropped to the 960x339 frame.
+SIZES = ((480, 170), (720, 254), (960, 339))
+OPTIONS = {"crop": "center", "upscale": True}
+
+_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+_pool_settings = None
+
+
+def thumbnail_options():
+    return getattr(settings, "POSTS_THUMBNAILS", {})
+
+
+def image_info(image):
+    """Returns width, height and format of an image file, or Nones."""
+    from PIL import Image
+
+    try:
+        with Image.open(image) as source:
+            info = (*source.size, source.format or "")
+    except (OSError, ValueError):
+        info = (None, None, "")
+    image.seek(0)
+    return info
+
+
+def geometry(size):
+    return "%sx%s" % size
+
+
+def sizes_for(width):
+    """
+    Returns the sizes worth listing for an image of a width:
+    those not wider than the source, and the smallest one anyway.
+    """
+    if not width:
+        return SIZES
+    return tuple(size for size in SIZES if size[0] <= width) or SIZES[:1]
+
+
+def generate(name):
+    """Renders every thumbnail size of an image, returns its name."""
+    # Imported here, so the spawned workers load it after django.setup().
+    from sorl.thumbnail import get_thumbnail
+
+    for size in SIZES:
+        get_thumbnail(name, geometry(size), **OPTIONS)
+    return name
+
+
+def import_image(path):
+    """
+    Validates an image file as PostForm does, stores
+    it as a post image and renders its thumbnails. Returns the stored
+    name with width, height and format, or an error message.
+    """
+    from django import forms
+    from django.core.exceptions import ValidationError
+    from django.core.files import File
+
+    from posts.models import Post
+
+    field = Post._meta.get_field("image")
+    try:
+        with open(path, "rb") as source:
+            image = forms.ImageField().clean(
+                File(source, name=os.path.basename(path))
+            )
+            info = image_info(image)
+            name = field.storage.save(
+                field.generate_filename(None, image.name), image
+            )
+    except (OSError, ValidationError) as error:
+        return {"error": f"{path}: {error}"}
+    generate(name)
+    return {"name": name, "info": info}
+
+
+def worker_settings():
+    """The settings workers must share with the calling process."""
+    from django.db import connection
+
+    return {
+        "DATABASE_NAME": connection.settings_dict["NAME"],
+        "MEDIA_ROOT": settings.MEDIA_ROOT,
+        "CACHES": settings.CACHES,
+    }
+
+
+def setup_worker(overrides):
+    """
+    Sets a spawned worker up on the database, media and cache
+    of the process that started it, test overrides included.
+    """
+    django.setup()
+    from django.db import connection
+
+    overrides = dict(overrides)
+    connection.settings_dict["NAME"] = overrides.pop("DATABASE_NAME")
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+
+
+def get_pool(workers=None):
+    """
+    Returns the process pool of the current process. Workers are
+    spawned rather than forked, so they do not inherit open database
+    and cache connections. The pool is replaced when the settings
+    workers share with this process change.
+    """
+    global _pool, _pool_pid, _pool_settings
+    shared = worker_settings()
+    with _lock:
+        if (
+            _pool is None
+            or _pool_pid != os.getpid()
+            or _pool_settings != shared
+        ):
+            if _pool is not None and _pool_pid == os.getpid():
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers or thumbnail_options().get("WORKERS"),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=setup_worker,
+                initargs=(shared,),
+            )
+            _pool_pid = os.getpid()
+            _pool_settings = shared
+        return _pool
+
+
+def schedule(name):
+    """
+    Queues thumbnails of an uploaded image to the process pool.
+    Skipped when workers can not open the database of this process,
+    an in-memory test one; sorl renders them on first display then.
+    """
+    from django.db import connection
+
+    if not thumbnail_options().get("ENABLED"):
+        return None
+    if getattr(connection, "is_in_memory_db", lambda: False)():
+        return None
+    return get_pool().submit(generate, name)
@@ -0,0 +1,79 @@
+from django.db import connection
+
+from posts.models import Follow, Post, Timeline
+
+
+# Fans rows out in one statement, for rows written without signals.
+FAN_OUT_QUERY = (
+    f"INSERT OR IGNORE INTO {Timeline._meta.db_table} "
+    f"(user_id, author_id, post_id, pub_date) "
+    f"SELECT follow.user_id, post.author_id, post.id, post.pub_date "
+    f"FROM {Follow._meta.db_table} AS follow "
+    f"JOIN {Post._meta.db_table} AS post "
+    f"ON post.author_id = follow.author_id WHERE %s"
+)
+
+
+def fan_out_post(post):
+    """Push a new :model:'posts.Post' into its author's followers feeds."""
+    if post.author_id is None:
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id,
+    ).values_list("user_id", flat=True)
+    Timeline.objects.bulk_create(
+        (
+            Timeline(
+                user_id=user_id,
+                author_id=post.author_id,
+                post_id=post.pk,
+                pub_date=post.pub_date,
+            )
+            for user_id in followers.iterator()
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Copy the author's existing posts into the follower's feed."""
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        "pk", "pub_date"
+    )
+    Timeline.objects.bulk_create(
+        (
+            Timeline(
+                user_id=user_id,
+                author_id=author_id,
+                post_id=post_id,
+                pub_date=pub_date,
+            )
+            for post_id, pub_date in posts.iterator()
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def trim(user_id, author_id):
+    """Drop the author's posts from the follower's feed."""
+    Timeline.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def fan_out_posts_since(post_id):
+    """
+    Push posts from the id on into their authors' followers feeds,
+    returns the number of feed entries added.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(FAN_OUT_QUERY % "post.id >= %s", (post_id,))
+        return cursor.rowcount
+
+
+def backfill_follows_since(follow_id):
+    """
+    Copy existing posts into the feeds of follows from the id on,
+    returns the number of feed entries added.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(FAN_OUT_QUERY % "follow.id >= %s", (follow_id,))
+        return cursor.rowcount
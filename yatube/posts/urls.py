@@ -8,8 +8,19 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('fragment/', views.index_fragment, name='index_fragment'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/fragment/',
+        views.group_fragment,
+        name='group_fragment'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/fragment/',
+        views.profile_fragment,
+        name='profile_fragment'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -18,7 +29,26 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comments_fragment,
+        name='comments_fragment'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'follow/fragment/',
+        views.follow_fragment,
+        name='follow_fragment'
+    ),
+    path('search/', views.search, name='search'),
+    path('export/<str:name>/', views.export_data, name='export'),
+    path('feed/', views.index_feed, name='index_feed'),
+    path('group/<slug:slug>/feed/', views.group_feed, name='group_feed'),
+    path(
+        'profile/<str:username>/feed/',
+        views.profile_feed,
+        name='profile_feed'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
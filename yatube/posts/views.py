@@ -1,21 +1,50 @@
-import operator
-
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
+from django.db.models import Q
 from django.contrib.auth import get_user_model
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.http import urlencode
 
-from posts.models import Follow, Post, Group
+from core.page_cache import cache_page_tagged, condition_tagged
+from core.queries import query_budget
+from core.write_queue import save_new
+from posts import cache_tags, export, feeds
+from posts.lookups import get_author_or_404, get_group_or_404
+from posts.models import Comment, Follow, Post
 from posts.forms import PostForm, CommentForm
+from posts.paginators import CURSOR_ORDERING, CursorPaginator
+from posts.search import search_posts
 
 
 POSTS_ON_PAGE: int = 10
+COMMENTS_ON_PAGE: int = 20
+COMMENT_ORDERING = ("created", "pk")
 User = get_user_model()
-CACHE_PERIOD = 20
+CACHE_PERIOD = 60 * 60 * 6
+FOLLOW_CURSOR_ORDERING = (
+    "timeline_entries__pub_date",
+    "timeline_entries__post_id",
+)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def follow_scope(user):
+    """
+    The timeline entries of a user, to pass as the ``scope`` of
+    a paginator on FOLLOW_CURSOR_ORDERING.
+    """
+    return Q(timeline_entries__user=user)
 
 
-@cache_page(CACHE_PERIOD, key_prefix="index_page")
+@query_budget(4)
+@condition_tagged(cache_tags.index_tags)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="index_page", tags=cache_tags.index_tags
+)
 def index(request):
     """
     Displays a paginated amount of
@@ -43,6 +72,11 @@ def index(request):
     return render(request, template, context)
 
 
+@query_budget(5)
+@condition_tagged(cache_tags.group_tags)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="group_page", tags=cache_tags.group_tags
+)
 def group_posts(request, slug):
     """
     Displays a paginated amount of
@@ -57,8 +91,8 @@ def group_posts(request, slug):
     **Template**
     :template:'posts/group_list.html'
     """
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related("group")
+    group = get_group_or_404(slug)
+    posts = group.posts.select_related("author", "group")
     page_obj = paginator(posts, request)
     context = {
         "group": group,
@@ -68,6 +102,11 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@query_budget(7)
+@condition_tagged(cache_tags.profile_tags)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="profile_page", tags=cache_tags.profile_tags
+)
 def profile(request, username):
     """
     Displays a paginated amount of
@@ -76,9 +115,8 @@ def profile(request, username):
     :model:'posts.Follow' instances.
     **Context**
     An instance of :model:'posts.User' and related
-    instances of :model:'posts.Post'. Also contains
-    the variable 'following' to act on :model:'posts.Follow'
-    instance.
+    instances of :model:'posts.Post'. The follow button is
+    a :tag:'hole', rendered per user on top of the cached page.
     **Template tags**
     :tag:'load', :tag:'include', :tag:'year', :tag:'thumbnail',
     :tag:'extends', :tag:'block', :tag:'url', :tag:'if',
@@ -86,29 +124,31 @@ def profile(request, username):
     **Template**
     :template:'posts/profile.html'
     """
-    author = get_object_or_404(User, username=username)
+    author = get_author_or_404(username)
     posts = author.posts.select_related("group")
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(user=request.user, author=author)
-    else:
-        following = False
     page_obj = paginator(posts, request)
     context = {
         "page_obj": page_obj,
         "author": author,
-        "following": following,
     }
     template = "posts/profile.html"
     return render(request, template, context)
 
 
+@query_budget(5)
+@condition_tagged(cache_tags.post_detail_tags)
+@cache_page_tagged(
+    CACHE_PERIOD,
+    key_prefix="post_page",
+    tags=cache_tags.post_detail_tags,
+)
 def post_detail(request, post_id):
     """
     Displays an individual :model:'posts.Post', the amount of
     :model:'posts.Comment' & related comment form.
     **Context**
-    An instances of
-    :model:'posts.Post', 'posts.Comment'
+    An instances of :model:'posts.Post' and the first page
+    of its :model:'posts.Comment' instances, oldest first.
     **Template tags**
     :tag:'load', :tag:'include', :tag:'extends', :tag:'block',
     :tag:'url', :tag:'if', :tag:'date', :tag:'for',
@@ -118,8 +158,10 @@ def post_detail(request, post_id):
     **Template**
     :template:'posts/post_detail.html'
     """
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.select_related("author", "post")
+    post = get_object_or_404(
+        Post.objects.select_related("author__stats", "group"), pk=post_id
+    )
+    comments = comments_page(post.comments.all())
     form = CommentForm(request.POST or None)
     if form.is_valid():
         return redirect("posts/<int:post_id>/comment/", post_id=post_id)
@@ -132,6 +174,7 @@ def post_detail(request, post_id):
     return render(request, template, context)
 
 
+@query_budget(3)
 @login_required
 def post_create(request):
     """
@@ -154,10 +197,11 @@ def post_create(request):
         return render(request, "posts/create_post.html", {"form": form})
     create_post = form.save(commit=False)
     create_post.author = request.user
-    create_post.save()
+    save_new(create_post)
     return redirect("posts:profile", username=request.user)
 
 
+@query_budget(4)
 @login_required
 def post_edit(request, post_id):
     """
@@ -183,8 +227,7 @@ def post_edit(request, post_id):
         files=request.FILES or None,
         instance=post,
     )
-    author = post.author
-    if author != request.user:
+    if post.author_id != request.user.pk:
         return redirect("posts:post_detail", post_id=post_id)
     if not form.is_valid():
         return render(
@@ -199,14 +242,59 @@ def post_edit(request, post_id):
     return redirect("posts:post_detail", post_id=post_id)
 
 
-def paginator(posts, request):
-    """Paginate :model:'posts.Post' instances display."""
+def paginator(posts, request, ordering=CURSOR_ORDERING, scope=None):
+    """
+    Paginate :model:'posts.Post' instances display.
+    Switches to keyset pagination on (pub_date, id) when
+    settings.POSTS_CURSOR_PAGINATION is on or the request
+    carries an 'after'/'before' cursor.
+    """
+    after = request.GET.get("after")
+    before = request.GET.get("before")
+    if after or before or settings.POSTS_CURSOR_PAGINATION:
+        return CursorPaginator(
+            posts, POSTS_ON_PAGE, ordering, attrs=CURSOR_ORDERING,
+            scope=scope,
+        ).get_page(after=after, before=before)
+    if scope is not None:
+        posts = posts.filter(scope)
     paginator = Paginator(posts, POSTS_ON_PAGE)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
     return page_obj
 
 
+def fragment(request, posts, ordering=CURSOR_ORDERING, scope=None):
+    """
+    Renders a page of :model:'posts.Post' cards alone, without
+    the site chrome and context processors, for infinite scroll.
+    The cursor of the next page is sent in the X-Next-Cursor header.
+    """
+    page_obj = CursorPaginator(
+        posts, POSTS_ON_PAGE, ordering, attrs=CURSOR_ORDERING, scope=scope
+    ).get_page(after=request.GET.get("after"))
+    response = HttpResponse(
+        render_to_string("includes/card.html", {"page_obj": page_obj})
+    )
+    if page_obj.has_next():
+        response[NEXT_CURSOR_HEADER] = page_obj.next_cursor
+    return response
+
+
+def comments_page(comments, after=None):
+    """
+    Paginate :model:'posts.Comment' instances oldest first,
+    with a cursor on (created, id).
+    """
+    return CursorPaginator(
+        comments.select_related("author"),
+        COMMENTS_ON_PAGE,
+        COMMENT_ORDERING,
+        descending=False,
+    ).get_page(after=after)
+
+
+@query_budget(3)
 @login_required
 def add_comment(request, post_id):
     """
@@ -220,10 +308,11 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        save_new(comment)
     return redirect("posts:post_detail", post_id=post_id)
 
 
+@query_budget(3)
 @login_required
 def follow_index(request):
     """
@@ -242,13 +331,12 @@ def follow_index(request):
     """
     FOLLOW: int = 1
 
-    user = request.user
-    follows = Follow.objects.filter(user=user)
-    posts = []
-    for follow in follows:
-        posts += follow.author.posts.select_related("author", "group")
-    posts.sort(key=operator.attrgetter("pub_date"), reverse=True)
-    page_obj = paginator(posts, request)
+    posts = Post.objects.select_related(
+        "author", "group",
+    ).order_by("-timeline_entries__pub_date", "-pk")
+    page_obj = paginator(
+        posts, request, FOLLOW_CURSOR_ORDERING, follow_scope(request.user)
+    )
     context = {
         "page_obj": page_obj,
         "follow": FOLLOW,
@@ -257,25 +345,210 @@ def follow_index(request):
     return render(request, template, context)
 
 
+@query_budget(4)
+def search(request):
+    """
+    Displays :model:'posts.Post' instances matching the 'q'
+    query, ranked by the full-text index.
+    **Context**
+    A page of instances of :model:'posts.Post' with snippets.
+    **Template tags**
+    :tag:'load', :tag:'include', :tag:'extends', :tag:'block',
+    :tag:'url', :tag:'if', :tag:'date', :tag:'for', :tag:'with'
+    **Template**
+    :template:'posts/search.html'
+    """
+    query = request.GET.get("q", "").strip()
+    posts = search_posts(query).select_related("author", "group")
+    page_obj = Paginator(posts, POSTS_ON_PAGE).get_page(
+        request.GET.get("page")
+    )
+    context = {
+        "page_obj": page_obj,
+        "query": query,
+        "page_query": urlencode({"q": query}) + "&",
+    }
+    template = "posts/search.html"
+    return render(request, template, context)
+
+
+@query_budget(2)
 @login_required
 def profile_follow(request, username):
     """
     Creates :model:'posts.Follow' instance.
     For authorised users only, otherwise redirects to login url.
     """
-    author = get_object_or_404(User, username=username)
+    author = get_author_or_404(username)
     user = request.user
     if author != user:
         Follow.objects.get_or_create(user=user, author=author)
     return redirect("posts:profile", username=username)
 
 
+@query_budget(3)
 @login_required
 def profile_unfollow(request, username):
     """
     Deletes :model:'posts.Follow' instance.
     For authorised users only, otherwise redirects to login url.
     """
-    author = get_object_or_404(User, username=username)
+    author = get_author_or_404(username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect("posts:profile", username=username)
+
+
+@staff_member_required
+def export_data(request, name):
+    """
+    Streams every :model:'posts.Post', :model:'posts.Comment',
+    :model:'posts.Follow' or :model:'posts.Group' instance as JSON
+    lines, gzip-compressed with '?gzip=1'. Staff only.
+    Has no query budget: the stream reads a query per chunk of rows.
+    """
+    if name not in export.EXPORTS:
+        raise Http404
+    content = export.jsonl(name)
+    filename = f"{name}.jsonl"
+    content_type = "application/x-ndjson"
+    if request.GET.get("gzip"):
+        content = export.gzipped(content)
+        filename += ".gz"
+        content_type = "application/gzip"
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@query_budget(1)
+@condition_tagged(cache_tags.index_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="index_feed", tags=cache_tags.index_tags
+)
+def index_feed(request):
+    """
+    Syndicates the latest :model:'posts.Post' instances as RSS,
+    or as Atom with '?format=atom'.
+    """
+    return feeds.PostsFeed(feeds.feed_type(request))(request)
+
+
+@query_budget(2)
+@condition_tagged(cache_tags.group_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="group_feed", tags=cache_tags.group_tags
+)
+def group_feed(request, slug):
+    """
+    Syndicates the latest :model:'posts.Post' instances of
+    a :model:'posts.Group' as RSS, or as Atom with '?format=atom'.
+    """
+    return feeds.GroupFeed(feeds.feed_type(request))(request, slug=slug)
+
+
+@query_budget(2)
+@condition_tagged(cache_tags.profile_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="profile_feed", tags=cache_tags.profile_tags
+)
+def profile_feed(request, username):
+    """
+    Syndicates the latest :model:'posts.Post' instances of
+    an author as RSS, or as Atom with '?format=atom'.
+    """
+    return feeds.AuthorFeed(feeds.feed_type(request))(
+        request, username=username
+    )
+
+
+@query_budget(1)
+@condition_tagged(cache_tags.index_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="index_fragment", tags=cache_tags.index_tags
+)
+def index_fragment(request):
+    """
+    The cards of the next page of :view:'posts.index'.
+    **Template**
+    :template:'includes/card.html'
+    """
+    return fragment(request, Post.objects.select_related("author", "group"))
+
+
+@query_budget(2)
+@condition_tagged(cache_tags.group_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD, key_prefix="group_fragment", tags=cache_tags.group_tags
+)
+def group_fragment(request, slug):
+    """
+    The cards of the next page of :view:'posts.group_posts'.
+    **Template**
+    :template:'includes/card.html'
+    """
+    group = get_group_or_404(slug)
+    return fragment(request, group.posts.select_related("author", "group"))
+
+
+@query_budget(2)
+@condition_tagged(cache_tags.profile_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD,
+    key_prefix="profile_fragment",
+    tags=cache_tags.profile_tags,
+)
+def profile_fragment(request, username):
+    """
+    The cards of the next page of :view:'posts.profile'.
+    **Template**
+    :template:'includes/card.html'
+    """
+    author = get_author_or_404(username)
+    return fragment(request, author.posts.select_related("group"))
+
+
+@query_budget(3)
+@login_required
+def follow_fragment(request):
+    """
+    The cards of the next page of :view:'posts.follow_index'.
+    For authorised users only, otherwise redirects to login url.
+    **Template**
+    :template:'includes/card.html'
+    """
+    return fragment(
+        request,
+        Post.objects.select_related("author", "group"),
+        FOLLOW_CURSOR_ORDERING,
+        follow_scope(request.user),
+    )
+
+
+@query_budget(3)
+@condition_tagged(cache_tags.post_detail_tags, per_user=False)
+@cache_page_tagged(
+    CACHE_PERIOD,
+    key_prefix="comments_fragment",
+    tags=cache_tags.post_detail_tags,
+)
+def comments_fragment(request, post_id):
+    """
+    The :model:'posts.Comment' instances of a post after
+    the 'after' cursor, for the rest of :view:'posts.post_detail'.
+    The cursor of the next page is sent in the X-Next-Cursor header.
+    **Template**
+    :template:'posts/includes/comments.html'
+    """
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    comments = comments_page(
+        Comment.objects.filter(post_id=post_id), request.GET.get("after")
+    )
+    response = HttpResponse(
+        render_to_string(
+            "posts/includes/comments.html", {"comments": comments}
+        )
+    )
+    if comments.has_next():
+        response[NEXT_CURSOR_HEADER] = comments.next_cursor
+    return response
@@ -1,4 +1,8 @@
+import atexit
 import os
+import shutil
+import sys
+import tempfile
 
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -23,6 +27,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -33,6 +38,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -46,7 +53,7 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,6 +77,46 @@ DATABASES = {
     }
 }
 
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_BUSY_RETRY = {
+    'ATTEMPTS': 5,
+    'BASE_DELAY': 0.05,
+    'MAX_DELAY': 1.0,
+}
+
+POSTS_THUMBNAILS = {
+    'ENABLED': True,
+    'WORKERS': 2,
+}
+
+# /metrics/ answers staff users, and scrapers sending TOKEN in an
+# "Authorization: Bearer" header when one is set.
+REQUEST_METRICS = {
+    'ENABLED': True,
+    'NAMESPACES': ('posts', 'users', 'about', 'api', 'core'),
+    'FLUSH_INTERVAL': 1.0,
+    'TOKEN': None,
+}
+
+QUERY_INSPECTOR = {
+    'ENABLED': False,
+    'REPEATED': 3,
+}
+
+WRITE_QUEUE = {
+    'ENABLED': False,
+    'MAX_BATCH': 100,
+    'MAX_WAIT': 0.005,
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -115,6 +162,36 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_SIZE': 128 * 1024 * 1024,
+        },
     }
 }
+
+# Test runs get a scratch cache file, so they neither clear the live
+# cache nor leave a file next to the project.
+if sys.argv[1:2] == ['test'] or 'pytest' in sys.modules:
+    TEST_CACHE_DIR = tempfile.mkdtemp(prefix='yatube-cache-')
+    atexit.register(shutil.rmtree, TEST_CACHE_DIR, ignore_errors=True)
+    CACHES['default']['LOCATION'] = os.path.join(
+        TEST_CACHE_DIR, 'cache.sqlite3'
+    )
+
+L1_CACHE = {
+    'MAX_ENTRIES': 500,
+    'TIMEOUT': 300,
+    'CHECK_INTERVAL': 1.0,
+}
+
+# Stale copies of a page are served for STALE seconds past its expiry
+# while one request rebuilds it, LOCK_TIMEOUT bounds a rebuild and
+# BETA scales the early refresh of hot pages.
+PAGE_CACHE = {
+    'STALE': 30,
+    'LOCK_TIMEOUT': 10,
+    'BETA': 1.0,
+}
+
+POSTS_CURSOR_PAGINATION = False